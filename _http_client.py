@@ -0,0 +1,136 @@
+"""
+Shared HTTP helper for the authentication test and debug scripts.
+Holds one keep-alive connection to the local API server that every request reuses.
+Set AFSP_IN_PROCESS=1 to call the FastAPI app in this process instead, with no server or sockets.
+"""
+import asyncio
+import atexit
+import http.client
+import os
+import urllib.parse
+
+import httpx
+import orjson
+
+HOST = "localhost"
+PORT = 8000
+TIMEOUT = 10
+BASE_URL = f"http://{HOST}:{PORT}"
+
+IN_PROCESS = os.environ.get("AFSP_IN_PROCESS", "").strip().lower() in ("1", "true", "yes", "on")
+
+_CONN = http.client.HTTPConnection(HOST, PORT, timeout=TIMEOUT)
+_test_client = None
+
+# Raised when the server has dropped the kept-alive connection; the request is retried once.
+# The request may already have reached the server by then, so only idempotent methods are resent,
+# except on CannotSendRequest, which http.client raises before writing anything.
+_RECONNECT_ERRORS = (http.client.BadStatusLine, http.client.CannotSendRequest, ConnectionError)
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_test_client():
+    """Return the TestClient for the in-process app, running its startup hooks on first use"""
+    global _test_client
+    if _test_client is None:
+        # Imported here so the socket-based scripts don't need the app's dependencies
+        from fastapi.testclient import TestClient
+        from afsp_app.app.main import app
+
+        _test_client = TestClient(app)
+        _test_client.__enter__()
+        atexit.register(_test_client.__exit__, None, None, None)
+    return _test_client
+
+
+def open_client():
+    """Return a new synchronous client for the API, to be used in a with block"""
+    if IN_PROCESS:
+        from fastapi.testclient import TestClient
+        from afsp_app.app.main import app
+
+        return TestClient(app)
+    return httpx.Client(base_url=BASE_URL, timeout=TIMEOUT)
+
+
+def open_async_client():
+    """Return a new asynchronous client for the API, to be used in an async with block"""
+    if IN_PROCESS:
+        transport = httpx.ASGITransport(app=get_test_client().app)
+        return httpx.AsyncClient(transport=transport, base_url="http://test", timeout=TIMEOUT)
+    return httpx.AsyncClient(base_url=BASE_URL, timeout=TIMEOUT)
+
+
+def run_async(async_fn, *args):
+    """
+    Run an async function to completion.
+
+    In-process it runs on the TestClient's event loop, so it shares the app's database engine.
+    """
+    if IN_PROCESS:
+        return get_test_client().portal.call(async_fn, *args)
+    return asyncio.run(async_fn(*args))
+
+
+def _send(method, path, body, headers):
+    """Send one request over the shared connection and read the whole response"""
+    if IN_PROCESS:
+        response = get_test_client().request(method, path, content=body, headers=headers)
+        return response.status_code, response.text, dict(response.headers)
+
+    _CONN.request(method, path, body=body, headers=headers)
+    response = _CONN.getresponse()
+    return response.status, response.read().decode('utf-8'), dict(response.getheaders())
+
+
+def request(method, path, data=None, headers=None, debug=False):
+    """
+    Make an HTTP request to the local server over the shared connection.
+
+    Args:
+        method: HTTP method, e.g. "GET" or "POST"
+        path: Request path, e.g. "/auth/jwt/login"
+        data: Optional dict, sent as JSON when the Content-Type header says so and form-encoded otherwise
+        headers: Optional request headers
+        debug: Print the request and the full response
+
+    Returns:
+        Tuple of (status code, response body); the status is None if the request failed
+    """
+    headers = dict(headers or {})
+
+    if debug:
+        print(f"Making {method} request to: {BASE_URL}{path}")
+        print(f"Headers: {headers}")
+
+    body = data
+    if isinstance(data, dict):
+        if headers.get('Content-Type') == 'application/json':
+            body = orjson.dumps(data)
+        else:
+            body = urllib.parse.urlencode(data).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    if debug and body is not None:
+        print(f"Data: {body}")
+
+    try:
+        try:
+            status, response_body, response_headers = _send(method, path, body, headers)
+        except _RECONNECT_ERRORS as e:
+            if method.upper() not in _IDEMPOTENT_METHODS and not isinstance(e, http.client.CannotSendRequest):
+                raise
+            _CONN.close()
+            status, response_body, response_headers = _send(method, path, body, headers)
+    except Exception as e:
+        _CONN.close()
+        if debug:
+            print(f"Request failed: {e}")
+        return None, str(e)
+
+    if debug:
+        is_error = status >= 400
+        print(f"{'HTTP Error' if is_error else 'Response'} code: {status}")
+        print(f"{'Error' if is_error else 'Response'} headers: {response_headers}")
+        print(f"{'Error' if is_error else 'Response'} body: {response_body}")
+
+    return status, response_body
@@ -5,7 +5,8 @@ Raw Data Extraction Agent for extracting transaction data from various file form
 import logging
 import os
 import tempfile
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 import PyPDF2
 import csv
 from io import StringIO, BytesIO
@@ -15,7 +16,7 @@ import pandas as pd
 from pdf2image import convert_from_path
 
 from afsp_app.app.schemas import RawTransactionData
-from afsp_app.app.tools.ocr_tool import perform_ocr
+from afsp_app.app.tools.ocr_tool import perform_ocr, perform_ocr_batch
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -75,6 +76,8 @@ class RawDataExtractionAgent:
         """
         result = []
         source_file_name = os.path.basename(file_path)
+        # One extraction timestamp shared by every row from this file
+        extracted_at = datetime.now()
         
         try:
             # Try to determine dialect and encoding
@@ -109,7 +112,8 @@ class RawDataExtractionAgent:
                             raw_text=raw_text,
                             source_file_name=source_file_name,
                             source_file_type="CSV",
-                            line_number=i+1
+                            line_number=i+1,
+                            timestamp_extracted=extracted_at
                         )
                         result.append(raw_data_item)
                         
@@ -125,7 +129,8 @@ class RawDataExtractionAgent:
                             raw_text=raw_text,
                             source_file_name=source_file_name,
                             source_file_type="CSV",
-                            line_number=i+1
+                            line_number=i+1,
+                            timestamp_extracted=extracted_at
                         )
                         result.append(raw_data_item)
         
@@ -146,6 +151,7 @@ class RawDataExtractionAgent:
         """
         result = []
         source_file_name = os.path.basename(file_path)
+        extracted_at = datetime.now()
         
         try:
             # Open the PDF file
@@ -158,68 +164,96 @@ class RawDataExtractionAgent:
                     logger.error(f"PDF is encrypted: {file_path}")
                     return []
                 
-                # Process each page
+                # Extract the text layer of each page
+                pages = []
                 for i, page in enumerate(pdf_reader.pages):
                     try:
-                        # Extract text from page
-                        text = page.extract_text()
-                        
-                        # If text extraction failed or returned very little text,
-                        # the PDF may be scanned/image-based, try OCR
-                        if not text or len(text.strip()) < 100:
-                            logger.info(f"Page {i+1} has little or no extractable text, attempting OCR")
-                            
-                            try:
-                                # Use pdf2image to convert the PDF page to an image
-                                with tempfile.TemporaryDirectory() as temp_dir:
-                                    # Convert the specific page to an image
-                                    images = convert_from_path(
-                                        file_path, 
-                                        output_folder=temp_dir, 
-                                        first_page=i+1, 
-                                        last_page=i+1
-                                    )
-                                    
-                                    if images:
-                                        # Convert the image to bytes and perform OCR
-                                        with BytesIO() as image_bytes:
-                                            images[0].save(image_bytes, format='PNG')
-                                            image_bytes.seek(0)
-                                            ocr_text = perform_ocr(image_bytes.read())
-                                            
-                                            if ocr_text and len(ocr_text.strip()) > 0:
-                                                text = ocr_text
-                                                logger.info(f"OCR successful on page {i+1}")
-                                            else:
-                                                logger.warning(f"OCR failed to extract text from page {i+1}")
-                            except Exception as ocr_error:
-                                logger.error(f"Error during OCR processing: {str(ocr_error)}")
-                                                            
-                            raw_data_item = RawTransactionData(
-                                raw_text=text or f"[OCR FAILED] No text could be extracted from page {i+1}",
-                                source_file_name=source_file_name,
-                                source_file_type="PDF",
-                                page_number=i+1
-                            )
-                        else:
-                            # Create RawTransactionData for this page
-                            raw_data_item = RawTransactionData(
-                                raw_text=text,
-                                source_file_name=source_file_name,
-                                source_file_type="PDF",
-                                page_number=i+1
-                            )
-                        
-                        result.append(raw_data_item)
-                        
+                        pages.append((i + 1, page.extract_text()))
                     except Exception as e:
                         logger.error(f"Error processing page {i+1}: {str(e)}")
+            
+            # If text extraction failed or returned very little text,
+            # the page may be scanned/image-based, so OCR those pages together
+            ocr_page_numbers = [
+                page_number for page_number, text in pages
+                if not text or len(text.strip()) < 100
+            ]
+            try:
+                ocr_results = self._ocr_pdf_pages(file_path, ocr_page_numbers)
+            except Exception as e:
+                # Keep the pages whose text layer was extracted; only the OCR'd pages go without
+                logger.error(f"Error during OCR processing: {str(e)}")
+                ocr_results = dict.fromkeys(ocr_page_numbers)
+            
+            for page_number, text in pages:
+                if page_number in ocr_results:
+                    ocr_text = ocr_results[page_number]
+                    if ocr_text and len(ocr_text.strip()) > 0:
+                        text = ocr_text
+                        logger.info(f"OCR successful on page {page_number}")
+                    else:
+                        logger.warning(f"OCR failed to extract text from page {page_number}")
+                    
+                    text = text or f"[OCR FAILED] No text could be extracted from page {page_number}"
+                
+                # Create RawTransactionData for this page
+                raw_data_item = RawTransactionData(
+                    raw_text=text,
+                    source_file_name=source_file_name,
+                    source_file_type="PDF",
+                    page_number=page_number,
+                    timestamp_extracted=extracted_at
+                )
+                result.append(raw_data_item)
                 
         except Exception as e:
             logger.error(f"Error extracting from PDF: {str(e)}")
         
         return result
     
+    def _ocr_pdf_pages(self, file_path: str, page_numbers: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Render PDF pages to images and OCR them in parallel.
+        
+        Args:
+            file_path: Path to the PDF file
+            page_numbers: 1-based numbers of the pages to OCR
+            
+        Returns:
+            Dictionary mapping page number to OCR text (None if OCR failed)
+        """
+        if not page_numbers:
+            return {}
+        
+        page_images = {}
+        for page_number in page_numbers:
+            logger.info(f"Page {page_number} has little or no extractable text, attempting OCR")
+            
+            try:
+                # Use pdf2image to convert the PDF page to an image
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    # Convert the specific page to an image
+                    images = convert_from_path(
+                        file_path, 
+                        output_folder=temp_dir, 
+                        first_page=page_number, 
+                        last_page=page_number
+                    )
+                    
+                    if images:
+                        # Convert the image to bytes for OCR
+                        with BytesIO() as image_bytes:
+                            images[0].save(image_bytes, format='PNG')
+                            page_images[page_number] = image_bytes.getvalue()
+            except Exception as ocr_error:
+                logger.error(f"Error during OCR processing: {str(ocr_error)}")
+        
+        ocr_texts = perform_ocr_batch(list(page_images.values()))
+        
+        results = dict.fromkeys(page_numbers)
+        results.update(zip(page_images.keys(), ocr_texts))
+        return results
+    
     def _extract_from_docx(self, file_path: str) -> List[RawTransactionData]:
         """
         Extract data from a DOCX file.
@@ -232,6 +266,7 @@ class RawDataExtractionAgent:
         """
         result = []
         source_file_name = os.path.basename(file_path)
+        extracted_at = datetime.now()
         
         try:
             # Open the DOCX file
@@ -250,7 +285,8 @@ class RawDataExtractionAgent:
                     raw_text=text,
                     source_file_name=source_file_name,
                     source_file_type="DOCX",
-                    line_number=i+1
+                    line_number=i+1,
+                    timestamp_extracted=extracted_at
                 )
                 result.append(raw_data_item)
                 
@@ -8,7 +8,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from afsp_app.app.schemas import RawTransactionData, ReceiptData
-from afsp_app.app.tools.date_parser import parse_date_robustly, extract_dates_from_text
+from afsp_app.app.tools.date_parser import parse_date_robustly, iter_dates_from_text
 from afsp_app.app.tools.amount_parser import extract_numeric_amount
 
 # Configure logging
@@ -21,6 +21,30 @@ class ReceiptExtractorAgent:
     Uses regex and pattern matching to identify receipt fields.
     """
     
+    # Patterns are compiled once for the class rather than looked up in the re cache on every call
+    _DATE_LIKE_RE = re.compile(r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}')
+    _NUMERIC_LINE_RE = re.compile(r'^[\d\-\.\(\)\s]+$')
+    _VENDOR_PATTERNS = (
+        re.compile(r'(?i)(?:store|merchant|vendor)[:\s]+([^\n]+)'),
+        re.compile(r'(?i)(?:welcome to|thank you for shopping at)[:\s]+([^\n]+)'),
+    )
+    _DATE_LABEL_PATTERNS = (
+        re.compile(r'(?i)(?:date|time)[:\s]+([^\n]+)'),
+        re.compile(r'(?i)(?:receipt|invoice|transaction)[:\s]+([^\n]+)'),
+    )
+    _TOTAL_PATTERNS = (
+        re.compile(r'(?i)total[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})'),
+        re.compile(r'(?i)(?:amount|sum|grand total|payment)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})'),
+        re.compile(r'(?i)(?:total|amount|sum)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})'),
+        # Common misspellings or OCR errors
+        re.compile(r'(?i)(?:totai|totol|t0tal|tota1)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})'),
+    )
+    _AMOUNT_RE = re.compile(r'[\$£€]?([0-9,]+\.[0-9]{2})')
+    _ITEM_RE = re.compile(r'(.*?)\s+(\d+(?:\.\d+)?)\s*[xX]\s*[\$£€]?(\d+(?:\.\d+)?)\s*[\$£€]?(\d+(?:\.\d+)?)')
+    _SIMPLE_ITEM_RE = re.compile(r'(.*?)\s+[\$£€]?(\d+(?:\.\d+)?)\s*$')
+    _ITEMS_START_RE = re.compile(r'(?i)(?:item|description|qty|quantity|price|amount)')
+    _ITEMS_END_RE = re.compile(r'(?i)(?:subtotal|tax|total|balance|payment)')
+    
     def process_receipt(self, raw_data: RawTransactionData, image_path: str) -> Optional[ReceiptData]:
         """
         Process a receipt from raw OCR data.
@@ -84,31 +108,26 @@ class ReceiptExtractorAgent:
             Vendor name or default value if not found
         """
         # Vendor name is usually at the top of the receipt
-        # Try to find it in the first few lines
-        lines = text.split('\n')
+        # Try to find it in the first few lines, without splitting the rest of the text
+        lines = text.split('\n', 5)[:5]
         
         # Look for the first non-empty line that's not a date
-        for i in range(min(5, len(lines))):
-            line = lines[i].strip()
+        for line in lines:
+            line = line.strip()
             
             # Skip empty lines or lines that might be dates
-            if not line or re.search(r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}', line):
+            if not line or self._DATE_LIKE_RE.search(line):
                 continue
             
             # Skip if line is just numbers (like a phone number)
-            if re.match(r'^[\d\-\.\(\)\s]+$', line):
+            if self._NUMERIC_LINE_RE.match(line):
                 continue
                 
             return line
         
         # If no good candidate found in first few lines, check for common patterns
-        vendor_patterns = [
-            r'(?i)(?:store|merchant|vendor)[:\s]+([^\n]+)',
-            r'(?i)(?:welcome to|thank you for shopping at)[:\s]+([^\n]+)'
-        ]
-        
-        for pattern in vendor_patterns:
-            match = re.search(pattern, text)
+        for pattern in self._VENDOR_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
@@ -124,24 +143,15 @@ class ReceiptExtractorAgent:
         Returns:
             Transaction date or today's date if not found
         """
-        # Extract potential dates
-        dates = extract_dates_from_text(text)
-        
-        if dates:
-            # Try to parse each potential date
-            for date_str in dates:
-                parsed_date = parse_date_robustly(date_str)
-                if parsed_date:
-                    return parsed_date
+        # Try to parse each potential date, scanning only as far as the first one that parses
+        for date_str in iter_dates_from_text(text):
+            parsed_date = parse_date_robustly(date_str)
+            if parsed_date:
+                return parsed_date
         
         # If no date found, look for specific patterns
-        date_patterns = [
-            r'(?i)(?:date|time)[:\s]+([^\n]+)',
-            r'(?i)(?:receipt|invoice|transaction)[:\s]+([^\n]+)'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
+        for pattern in self._DATE_LABEL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 potential_date = match.group(1).strip()
                 parsed_date = parse_date_robustly(potential_date)
@@ -163,16 +173,8 @@ class ReceiptExtractorAgent:
             Total amount or 0.0 if not found
         """
         # Look for common patterns for total amount
-        total_patterns = [
-            r'(?i)total[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})',
-            r'(?i)(?:amount|sum|grand total|payment)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})',
-            r'(?i)(?:total|amount|sum)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})',
-            # Common misspellings or OCR errors
-            r'(?i)(?:totai|totol|t0tal|tota1)[:\s]+[\$£€]?([0-9,]+\.[0-9]{2})',
-        ]
-        
-        for pattern in total_patterns:
-            match = re.search(pattern, text)
+        for pattern in self._TOTAL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 amount_str = match.group(1).strip()
                 amount = extract_numeric_amount(amount_str)
@@ -181,7 +183,7 @@ class ReceiptExtractorAgent:
         
         # If no patterns matched, look for amount at the end of the receipt
         # Total is usually one of the last numbers on the receipt
-        amount_matches = re.findall(r'[\$£€]?([0-9,]+\.[0-9]{2})', text)
+        amount_matches = self._AMOUNT_RE.findall(text)
         if amount_matches:
             # Try amounts from the last quarter of the receipt first
             last_quarter = amount_matches[-max(len(amount_matches)//4, 1):]
@@ -212,10 +214,6 @@ class ReceiptExtractorAgent:
         # Split text into lines
         lines = text.split('\n')
         
-        # Look for lines that match item pattern
-        item_pattern = r'(.*?)\s+(\d+(?:\.\d+)?)\s*[xX]\s*[\$£€]?(\d+(?:\.\d+)?)\s*[\$£€]?(\d+(?:\.\d+)?)'
-        simple_pattern = r'(.*?)\s+[\$£€]?(\d+(?:\.\d+)?)\s*$'
-        
         in_items_section = False
         
         for line in lines:
@@ -226,17 +224,17 @@ class ReceiptExtractorAgent:
                 continue
             
             # Check if this line indicates the start of items section
-            if re.search(r'(?i)(?:item|description|qty|quantity|price|amount)', line):
+            if self._ITEMS_START_RE.search(line):
                 in_items_section = True
                 continue
             
             # Check if this line indicates the end of items section
-            if in_items_section and re.search(r'(?i)(?:subtotal|tax|total|balance|payment)', line):
+            if in_items_section and self._ITEMS_END_RE.search(line):
                 in_items_section = False
                 continue
             
             # Try to match item patterns
-            match = re.match(item_pattern, line)
+            match = self._ITEM_RE.match(line)
             if match:
                 item_name = match.group(1).strip()
                 quantity = float(match.group(2))
@@ -253,7 +251,7 @@ class ReceiptExtractorAgent:
             
             # Try simpler pattern (just item and price)
             if in_items_section or len(line_items) > 0:
-                match = re.match(simple_pattern, line)
+                match = self._SIMPLE_ITEM_RE.match(line)
                 if match:
                     item_name = match.group(1).strip()
                     price = float(match.group(2))
@@ -8,7 +8,7 @@ from typing import List, Dict, Any, Optional
 from datetime import date
 
 from afsp_app.app.schemas import RawTransactionData, ExtractedTransaction, NormalizedTransaction
-from afsp_app.app.tools.date_parser import parse_date_robustly, extract_dates_from_text
+from afsp_app.app.tools.date_parser import parse_date_robustly, iter_dates_from_text
 from afsp_app.app.tools.amount_parser import parse_amount_and_type
 from afsp_app.app.tools.description_cleaner import clean_description, categorize_description
 
@@ -110,9 +110,8 @@ class TransactionInterpretationAgent:
                     # If JSON parsing fails, continue with regular text extraction
                     pass
             
-            # Extract potential date from text
-            potential_dates = extract_dates_from_text(raw_text)
-            potential_date_str = potential_dates[0] if potential_dates else None
+            # Extract potential date from text; only the first one is used
+            potential_date_str = next(iter_dates_from_text(raw_text), None)
             
             if potential_date_str:
                 confidence_scores["date"] = 0.8
@@ -1,8 +1,8 @@
 import uuid
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import Depends, Request
-from fastapi_users import BaseUserManager, StringIDMixin
+from fastapi_users import BaseUserManager, exceptions
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
 
 from afsp_app.app.database import User, get_user_db
@@ -12,6 +12,18 @@ from afsp_app.app.services.email_service import email_service
 SECRET = settings.SECRET_KEY
 
 
+class StringIDMixin:
+    """
+    Mixin for parsing user IDs stored as strings (the User model keeps str(uuid4())).
+    fastapi-users only ships UUID and integer ID mixins.
+    """
+
+    def parse_id(self, value: Any) -> str:
+        if not isinstance(value, (str, uuid.UUID)):
+            raise exceptions.InvalidID()
+        return str(value)
+
+
 class UserManager(StringIDMixin, BaseUserManager[User, str]):
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
@@ -2,6 +2,7 @@
 Contains FastAPI application setup and API endpoints.
 """
 
+import asyncio
 import os
 import uuid
 from typing import List, Literal
@@ -345,7 +346,8 @@ async def process_file(
                 raise FileNotFoundError(f"Source file not found: {file_path}")
 
             extraction_agent = RawDataExtractionAgent()
-            raw_transactions = extraction_agent.extract_from_file(file_path, file_type)
+            # Extraction (OCR, PDF parsing) is blocking, so keep it off the event loop
+            raw_transactions = await asyncio.to_thread(extraction_agent.extract_from_file, file_path, file_type)
             if not raw_transactions:
                 raise ValueError("No transaction data could be extracted.")
             job_logger.info(f"Extracted {len(raw_transactions)} raw transactions.")
@@ -362,7 +364,15 @@ async def process_file(
 
             # Add transactions to the database
             for t in normalized_transactions:
-                db.add(Transaction(job_id=job_id, **t.model_dump()))
+                db.add(Transaction(
+                    transaction_id=t.transaction_id,
+                    job_id=job_id,
+                    date=t.date.isoformat(),
+                    description=t.description,
+                    amount=t.amount,
+                    transaction_type=t.transaction_type,
+                    processing_notes="; ".join(t.processing_notes) or None
+                ))
             job_logger.info(f"Added {len(normalized_transactions)} transactions to the database session.")
 
             # Update job status to COMPLETED
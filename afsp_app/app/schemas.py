@@ -3,6 +3,7 @@ Pydantic models for data validation and serialization.
 Defines the data structures used throughout the application.
 """
 
+from dataclasses import dataclass, field, asdict
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple, Literal, Any
 from pydantic import BaseModel, Field
@@ -10,9 +11,12 @@ import uuid
 from fastapi_users import schemas
 
 
-class RawTransactionData(BaseModel):
+@dataclass(slots=True, frozen=True)
+class RawTransactionData:
     """
     Initial unstructured data extracted from source documents.
+    Internal-only, so a plain slotted dataclass rather than a validated pydantic model;
+    one is created per extracted row.
     """
     raw_text: str
     source_file_name: str
@@ -20,7 +24,11 @@ class RawTransactionData(BaseModel):
     page_number: Optional[int] = None
     line_number: Optional[int] = None
     bounding_box: Optional[Tuple[float, float, float, float]] = None
-    timestamp_extracted: datetime = Field(default_factory=datetime.now)
+    timestamp_extracted: datetime = field(default_factory=datetime.now)
+    
+    def model_dump(self) -> Dict[str, Any]:
+        """Return the fields as a dictionary, mirroring the pydantic model API."""
+        return asdict(self)
 
 
 class ExtractedTransaction(BaseModel):
@@ -15,6 +15,16 @@ from afsp_app.app.schemas import RawTransactionData
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Supported file extensions and the file type each one is processed as
+_EXTENSION_TO_FILE_TYPE = {
+    'csv': 'CSV',
+    'pdf': 'PDF',
+    'docx': 'DOCX',
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+}
+
 
 class FileIngestionService:
     """
@@ -102,16 +112,12 @@ class FileIngestionService:
         Returns:
             Tuple of (is_valid, file_type)
         """
-        file_ext = Path(file_name).suffix.lower().lstrip('.')
-        valid_extensions = {'csv', 'pdf', 'docx', 'jpg', 'jpeg', 'png'}
-        
-        if file_ext not in valid_extensions:
-            return False, None
-        
-        if file_ext in ('jpg', 'jpeg'):
-            return True, 'JPEG'
+        # Only the last path component counts, so "uploads/.csv" has no extension
+        base_name = os.path.basename(file_name)
+        dot = base_name.rfind('.')
+        file_type = _EXTENSION_TO_FILE_TYPE.get(base_name[dot + 1:].lower()) if dot > 0 else None
         
-        return True, file_ext.upper()
+        return file_type is not None, file_type
     
     def clean_up_file(self, file_path: str) -> bool:
         """
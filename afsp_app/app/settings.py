@@ -1,80 +1,132 @@
 """
-Settings management for the AFSP application using pydantic-settings.
+Settings management for the AFSP application.
 This centralizes all configuration and makes it easier to load from environment variables.
 """
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+import json
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List
 
-class Settings(BaseSettings):
+from dotenv import load_dotenv
+
+# Values from a local .env file; variables already set in the environment take precedence
+if os.path.exists(".env"):
+    load_dotenv(".env", encoding="utf-8")
+
+ENV_PREFIX = "AFSP_"
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string setting from the AFSP_-prefixed environment variable."""
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the AFSP_-prefixed environment variable."""
+    value = os.environ.get(ENV_PREFIX + name)
+    return default if value is None else int(value)
+
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on", "y", "t"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "off", "n", "f", ""})
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on or 0/false/no/off) from the AFSP_-prefixed environment variable."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    normalized = value.strip().lower()
+    if normalized in _TRUE_VALUES:
+        return True
+    if normalized in _FALSE_VALUES:
+        return False
+    # A typo must not silently switch a setting such as email verification off
+    raise ValueError(f"{ENV_PREFIX + name} must be a boolean (true/false, yes/no, on/off or 1/0), got {value!r}")
+
+
+def _env_json(name: str, default: Any) -> Any:
+    """Read a list/dict setting, given as JSON, from the AFSP_-prefixed environment variable."""
+    value = os.environ.get(ENV_PREFIX + name)
+    return default if value is None else json.loads(value)
+
+
+BASE_DIR = Path(__file__).parent.parent.absolute()
+APP_DIR = Path(__file__).parent.absolute()
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """
     Application settings that can be loaded from environment variables or .env file.
+    Read once at import; every variable is prefixed with AFSP_.
     """
     # Base directories
-    BASE_DIR: Path = Path(__file__).parent.parent.absolute()
-    APP_DIR: Path = Path(__file__).parent.absolute()
+    BASE_DIR: Path = BASE_DIR
+    APP_DIR: Path = APP_DIR
     
     # File storage paths
-    UPLOAD_DIR: str = str(BASE_DIR / "uploads")
-    DOWNLOAD_DIR: str = str(BASE_DIR / "downloads")
-    DATABASE_PATH: str = str(BASE_DIR / "afsp.db")
+    UPLOAD_DIR: str = _env_str("UPLOAD_DIR", str(BASE_DIR / "uploads"))
+    DOWNLOAD_DIR: str = _env_str("DOWNLOAD_DIR", str(BASE_DIR / "downloads"))
+    DATABASE_PATH: str = _env_str("DATABASE_PATH", str(BASE_DIR / "afsp.db"))
+    OCR_CACHE_DIR: str = _env_str("OCR_CACHE_DIR", str(BASE_DIR / "ocr_cache"))
     
     # OCR settings
-    TESSERACT_PATH: str = "tesseract"
+    TESSERACT_PATH: str = _env_str("TESSERACT_PATH", "tesseract")
+    OCR_PSM: int = _env_int("OCR_PSM", 6)  # Tesseract page segmentation mode; 6 = single uniform block of text
+    OCR_BINARIZE: bool = _env_bool("OCR_BINARIZE", True)  # Otsu-threshold to 1-bit before OCR; disable for colour photos
+    OCR_CACHE_SIZE_LIMIT: int = _env_int("OCR_CACHE_SIZE_LIMIT", 500_000_000)  # Bytes of OCR text kept on disk
+    OCR_WORKERS: int = _env_int("OCR_WORKERS", os.cpu_count() or 1)  # Processes used to OCR multi-page documents
     
     # Processing settings
-    MAX_FILE_SIZE_MB: int = 10
+    MAX_FILE_SIZE_MB: int = _env_int("MAX_FILE_SIZE_MB", 10)
     
     # MIME type mapping
-    ALLOWED_EXTENSIONS: Dict[str, str] = {
+    ALLOWED_EXTENSIONS: Dict[str, str] = field(default_factory=lambda: _env_json("ALLOWED_EXTENSIONS", {
         "pdf": "application/pdf",
         "csv": "text/csv",
         "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         "jpg": "image/jpeg",
         "jpeg": "image/jpeg",
         "png": "image/png",
-    }
+    }))
     
     # Security settings
-    ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
+    ALLOWED_ORIGINS: List[str] = field(
+        default_factory=lambda: _env_json("ALLOWED_ORIGINS", ["http://localhost:3000"])
+    )
     
     # API settings
-    API_TITLE: str = "Automated Financial Statement Processor"
-    API_DESCRIPTION: str = "Convert bank statements and receipts to QuickBooks-compatible CSV formats"
-    API_VERSION: str = "1.0.0"
+    API_TITLE: str = _env_str("API_TITLE", "Automated Financial Statement Processor")
+    API_DESCRIPTION: str = _env_str("API_DESCRIPTION", "Convert bank statements and receipts to QuickBooks-compatible CSV formats")
+    API_VERSION: str = _env_str("API_VERSION", "1.0.0")
     
     # Secret key for JWT token generation
-    SECRET_KEY: str = "7b438f49eb134d49419c9e0c423f465cc651237ad8f3c12c43aa26f7821dcc14"
+    SECRET_KEY: str = _env_str("SECRET_KEY", "7b438f49eb134d49419c9e0c423f465cc651237ad8f3c12c43aa26f7821dcc14")
     
     # Environment settings
-    ENVIRONMENT: str = "development"  # development, staging, production
+    ENVIRONMENT: str = _env_str("ENVIRONMENT", "development")  # development, staging, production
     
     # Email verification settings
-    REQUIRE_EMAIL_VERIFICATION: bool = True  # Always true for production security
-    AUTO_VERIFY_IN_DEVELOPMENT: bool = True  # Bypass for development only
+    REQUIRE_EMAIL_VERIFICATION: bool = _env_bool("REQUIRE_EMAIL_VERIFICATION", True)  # Always true for production security
+    AUTO_VERIFY_IN_DEVELOPMENT: bool = _env_bool("AUTO_VERIFY_IN_DEVELOPMENT", True)  # Bypass for development only
     
     # Email server configuration (for production)
-    SMTP_SERVER: str = ""
-    SMTP_PORT: int = 587
-    SMTP_USERNAME: str = ""
-    SMTP_PASSWORD: str = ""
-    SMTP_USE_TLS: bool = True
+    SMTP_SERVER: str = _env_str("SMTP_SERVER", "")
+    SMTP_PORT: int = _env_int("SMTP_PORT", 587)
+    SMTP_USERNAME: str = _env_str("SMTP_USERNAME", "")
+    SMTP_PASSWORD: str = _env_str("SMTP_PASSWORD", "")
+    SMTP_USE_TLS: bool = _env_bool("SMTP_USE_TLS", True)
     
     # Email content settings
-    EMAIL_FROM: str = "noreply@afsp.local"
-    EMAIL_FROM_NAME: str = "AFSP - Financial Processor"
-    EMAIL_VERIFICATION_SUBJECT: str = "Verify your AFSP account"
+    EMAIL_FROM: str = _env_str("EMAIL_FROM", "noreply@afsp.local")
+    EMAIL_FROM_NAME: str = _env_str("EMAIL_FROM_NAME", "AFSP - Financial Processor")
+    EMAIL_VERIFICATION_SUBJECT: str = _env_str("EMAIL_VERIFICATION_SUBJECT", "Verify your AFSP account")
     
     # Frontend URL for verification links
-    FRONTEND_URL: str = "http://localhost:3000"
-    
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        extra="ignore",
-        env_prefix="AFSP_"
-    )
+    FRONTEND_URL: str = _env_str("FRONTEND_URL", "http://localhost:3000")
 
 # Create a global settings instance
 settings = Settings()
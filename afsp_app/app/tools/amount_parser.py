@@ -6,9 +6,39 @@ import re
 import logging
 from typing import Optional, Tuple, Literal
 
+try:
+    # JIT-compiled parser for plain amounts; extract_numeric_amount gives the same results without it
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Common amount layout: optional parentheses, a minus sign before or after
+# the currency symbol, then digits with thousands/decimal separators
+_SIMPLE_AMOUNT_RE = re.compile(
+    r'\s*(?P<open>\()?\s*(?P<minus>-)?\s*[\$£€¥]?\s*(?P<minus2>-)?'
+    r'(?P<number>\d[\d\.\,]*)\s*(?P<close>\))?\s*'
+)
+_NON_NUMERIC_RE = re.compile(r'[^\d\.\,\-]+')
+# Exactly the strings float() accepts once only digits, '.', and '-' are left
+_FLOAT_RE = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+
+# Keywords suggesting the transaction type, matched anywhere in the lowercased text
+# (not with re.IGNORECASE, which also equates characters str.lower() keeps apart, e.g. long s)
+CREDIT_INDICATORS = [
+    'credit', 'deposit', 'refund', 'payment received', 'cr', 'incoming',
+    'salary', 'interest', 'reimbursement'
+]
+DEBIT_INDICATORS = [
+    'debit', 'payment', 'withdrawal', 'purchase', 'dr', 'outgoing',
+    'fee', 'charge', 'bill', 'invoice'
+]
+_CREDIT_INDICATORS_RE = re.compile('|'.join(map(re.escape, CREDIT_INDICATORS)))
+_DEBIT_INDICATORS_RE = re.compile('|'.join(map(re.escape, DEBIT_INDICATORS)))
+
 
 def parse_amount_and_type(
     potential_amount_str: Optional[str] = None,
@@ -29,68 +59,55 @@ def parse_amount_and_type(
     """
     # First check if we have separate credit/debit columns
     if potential_credit_str:
-        try:
-            amount = extract_numeric_amount(potential_credit_str)
-            if amount is not None and amount != 0:
-                return abs(amount), "Credit"
-        except ValueError:
-            pass
+        amount = extract_numeric_amount(potential_credit_str)
+        if amount is not None and amount != 0:
+            return abs(amount), "Credit"
     
     if potential_debit_str:
-        try:
-            amount = extract_numeric_amount(potential_debit_str)
-            if amount is not None and amount != 0:
-                return -abs(amount), "Debit"
-        except ValueError:
-            pass
+        amount = extract_numeric_amount(potential_debit_str)
+        if amount is not None and amount != 0:
+            return -abs(amount), "Debit"
     
     # If no credit/debit specific columns, try the combined amount
     if potential_amount_str:
-        try:
-            # Check for indicators of credit/debit type
-            is_credit = contains_credit_indicators(potential_amount_str)
-            is_debit = contains_debit_indicators(potential_amount_str)
-            
-            # Extract the numeric value
-            amount = extract_numeric_amount(potential_amount_str)
-            
-            if amount is None:
-                return None, None
-            
-            # Determine sign and type based on indicators or sign
-            if amount < 0 or is_debit:
-                return -abs(amount), "Debit"
-            elif is_credit:
-                return abs(amount), "Credit"
-            else:
-                # Check if this is from a structured CSV file
-                if potential_amount_str and potential_amount_str.startswith("CSV:"):
-                    # Extract the actual amount from the CSV prefix format
-                    csv_amount_str = potential_amount_str.replace("CSV:", "")
-                    try:
-                        csv_amount = float(csv_amount_str.replace(",", ""))
-                        # For CSV files with structured data, respect the sign
-                        # Positive values are typically credits, negative are debits
-                        if csv_amount > 0:
-                            return csv_amount, "Credit"  # Keep as Credit
-                        else:
-                            return csv_amount, "Debit"  # Already negative, keep as Debit
-                    except ValueError:
-                        # If we can't parse the CSV amount, fall back to the extracted amount
-                        if amount > 0:
-                            return amount, "Credit"
-                        else:
-                            return amount, "Debit"
-                else:
-                    # For unstructured text, we default to Debit for positive amounts
-                    # since most transactions are expenses
+        # Extract the numeric value
+        amount = extract_numeric_amount(potential_amount_str)
+        
+        if amount is None:
+            return None, None
+        
+        # Determine sign and type based on indicators or sign; each keyword
+        # scan only runs when the earlier checks haven't settled the type
+        if amount < 0 or contains_debit_indicators(potential_amount_str):
+            return -abs(amount), "Debit"
+        elif contains_credit_indicators(potential_amount_str):
+            return abs(amount), "Credit"
+        else:
+            # Check if this is from a structured CSV file
+            if potential_amount_str.startswith("CSV:"):
+                # Extract the actual amount from the CSV prefix format
+                csv_amount_str = potential_amount_str.replace("CSV:", "")
+                try:
+                    csv_amount = float(csv_amount_str.replace(",", ""))
+                    # For CSV files with structured data, respect the sign
+                    # Positive values are typically credits, negative are debits
+                    if csv_amount > 0:
+                        return csv_amount, "Credit"  # Keep as Credit
+                    else:
+                        return csv_amount, "Debit"  # Already negative, keep as Debit
+                except ValueError:
+                    # If we can't parse the CSV amount, fall back to the extracted amount
                     if amount > 0:
-                        return -amount, "Debit"  # Invert and mark as Debit
+                        return amount, "Credit"
                     else:
                         return amount, "Debit"
-                    
-        except ValueError:
-            pass
+            else:
+                # For unstructured text, we default to Debit for positive amounts
+                # since most transactions are expenses
+                if amount > 0:
+                    return -amount, "Debit"  # Invert and mark as Debit
+                else:
+                    return amount, "Debit"
     
     return None, None
 
@@ -108,51 +125,160 @@ def extract_numeric_amount(amount_str: str) -> Optional[float]:
     if not amount_str or not isinstance(amount_str, str):
         return None
     
-    # Clean up the string
-    cleaned = amount_str.strip()
+    # Native path for plain ASCII amounts; NaN means it left the string to the code below
+    if _parse_plain_amount is not None and amount_str.isascii():
+        amount = _parse_plain_amount(np.frombuffer(amount_str.encode('ascii'), dtype=np.uint8))
+        if amount == amount:
+            return amount
+    
+    # Fast path: a single match picks out parentheses, sign and number
+    # for the usual shapes like "$1,234.56", "-123.45" or "($123.45)"
+    match = _SIMPLE_AMOUNT_RE.fullmatch(amount_str)
+    if match:
+        open_paren, minus, minus2, cleaned, close_paren = match.groups()
+        # Parentheses often indicate negative numbers
+        is_negative = open_paren is not None and close_paren is not None
+        if minus or minus2:
+            # A doubled sign like "-$-5" is not a number
+            cleaned = '--' + cleaned if minus and minus2 else '-' + cleaned
+    else:
+        # Check if it contains parentheses which often indicate negative numbers
+        is_negative = "(" in amount_str and ")" in amount_str
+        
+        # Remove currency symbols and other non-numeric characters except . and ,
+        # Keep - for negative numbers
+        cleaned = _NON_NUMERIC_RE.sub('', amount_str)
     
-    # Check if it contains parentheses which often indicate negative numbers
-    is_negative = "(" in cleaned and ")" in cleaned
+    cleaned = _normalize_separators(cleaned)
+    
+    # Validate up front instead of letting float() raise
+    if _FLOAT_RE.fullmatch(cleaned) is None:
+        logger.warning(f"Failed to convert '{amount_str}' to a number")
+        return None
+    
+    amount = float(cleaned)
+    
+    # Apply negative if it was in parentheses
     if is_negative:
-        cleaned = cleaned.replace("(", "").replace(")", "")
+        amount = -abs(amount)
+        
+    return amount
+
+
+def _normalize_separators(number_str: str) -> str:
+    """
+    Convert thousands/decimal separators to a form float() accepts.
+    
+    Args:
+        number_str: Digits with optional sign and separators
+        
+    Returns:
+        Number string using '.' as the only decimal separator
+    """
+    last_comma = number_str.rfind(',')
+    if last_comma < 0:
+        return number_str
     
-    # Remove currency symbols and other non-numeric characters except . and ,
-    # Keep - for negative numbers
-    cleaned = re.sub(r'[^\d\.\,\-]', '', cleaned)
+    last_dot = number_str.rfind('.')
     
     # Handle European vs US number formatting (1.234,56 vs 1,234.56)
-    if ',' in cleaned and '.' in cleaned:
-        # Determine which is the decimal separator based on position
-        last_comma = cleaned.rindex(',')
-        last_dot = cleaned.rindex('.')
-        
-        if last_comma > last_dot:
-            # European format: 1.234,56
-            cleaned = cleaned.replace('.', '')  # Remove thousand separators
-            cleaned = cleaned.replace(',', '.')  # Convert decimal separator
-        else:
-            # US format: 1,234.56
-            cleaned = cleaned.replace(',', '')  # Remove thousand separators
-    elif ',' in cleaned and '.' not in cleaned:
-        # Could be either 1,234 (US) or 1,23 (European)
-        if len(cleaned) - cleaned.rindex(',') <= 3:
-            # Likely European decimal: 1,23
-            cleaned = cleaned.replace(',', '.')
-        else:
-            # Likely US thousands: 1,234
-            cleaned = cleaned.replace(',', '')
+    if last_dot > last_comma:
+        # US format: 1,234.56
+        return number_str.replace(',', '')
+    
+    # With no dot, a comma could be either 1,234 (US) or 1,23 (European)
+    if last_dot >= 0 or len(number_str) - last_comma <= 3:
+        # European format: 1.234,56 or 1,23
+        return number_str.replace('.', '').replace(',', '.')
     
-    try:
-        amount = float(cleaned)
+    # Likely US thousands: 1,234
+    return number_str.replace(',', '')
+
+
+def _scan_plain_amount(buf) -> float:
+    """
+    Parse a plain amount from its ASCII bytes in a single pass.
+    
+    Handles "[(]-$-1,234.56[)]" shapes: optional wrapping parentheses, one minus sign
+    before or after an optional '$', US thousands groups and a '.' decimal part.
+    Anything else (blanks, European separators, more than 15 digits) is declined.
+    
+    Args:
+        buf: uint8 array of the amount string's bytes
         
-        # Apply negative if it was in parentheses
-        if is_negative:
-            amount = -abs(amount)
-            
-        return amount
-    except ValueError:
-        logger.warning(f"Failed to convert '{amount_str}' to a number")
-        return None
+    Returns:
+        Amount, or NaN if the string is not a plain amount
+    """
+    end = len(buf)
+    i = 0
+    in_parens = False
+    if end > 0 and buf[0] == 40:  # '('
+        if buf[end - 1] != 41:  # ')'
+            return np.nan
+        in_parens = True
+        i = 1
+        end -= 1
+    
+    negative = False
+    if i < end and buf[i] == 45:  # '-'
+        negative = True
+        i += 1
+    if i < end and buf[i] == 36:  # '$'
+        i += 1
+    if i < end and buf[i] == 45:
+        if negative:
+            return np.nan
+        negative = True
+        i += 1
+    
+    # Integer part: up to three leading digits per thousands group
+    mantissa = 0
+    digits = 0
+    start = i
+    while i < end and 48 <= buf[i] <= 57:
+        mantissa = mantissa * 10 + (int(buf[i]) - 48)
+        digits += 1
+        i += 1
+    if i == start:
+        return np.nan
+    if i < end and buf[i] == 44:  # ','
+        if i - start > 3:
+            return np.nan
+        while i < end and buf[i] == 44:
+            i += 1
+            for _ in range(3):
+                if i >= end or not 48 <= buf[i] <= 57:
+                    return np.nan
+                mantissa = mantissa * 10 + (int(buf[i]) - 48)
+                digits += 1
+                i += 1
+    
+    # Decimal part
+    scale = 0
+    if i < end and buf[i] == 46:  # '.'
+        i += 1
+        while i < end and 48 <= buf[i] <= 57:
+            mantissa = mantissa * 10 + (int(buf[i]) - 48)
+            digits += 1
+            scale += 1
+            i += 1
+    
+    # Both operands are exact below 2**53 and 1e22, so the division rounds the same way float() does
+    if i != end or digits > 15 or scale > 22:
+        return np.nan
+    divisor = 1.0
+    for _ in range(scale):
+        divisor *= 10.0
+    amount = mantissa / divisor
+    
+    if negative:
+        amount = -amount
+    if in_parens:
+        amount = -abs(amount)
+    return amount
+
+
+_parse_plain_amount = njit(cache=True)(_scan_plain_amount) if njit is not None else None
 
 
 def contains_credit_indicators(text: str) -> bool:
@@ -165,13 +291,7 @@ def contains_credit_indicators(text: str) -> bool:
     Returns:
         True if it contains credit indicators, False otherwise
     """
-    indicators = [
-        'credit', 'deposit', 'refund', 'payment received', 'cr', 'incoming',
-        'salary', 'interest', 'reimbursement'
-    ]
-    
-    lower_text = text.lower()
-    return any(indicator in lower_text for indicator in indicators)
+    return _CREDIT_INDICATORS_RE.search(text.lower()) is not None
 
 
 def contains_debit_indicators(text: str) -> bool:
@@ -184,10 +304,4 @@ def contains_debit_indicators(text: str) -> bool:
     Returns:
         True if it contains debit indicators, False otherwise
     """
-    indicators = [
-        'debit', 'payment', 'withdrawal', 'purchase', 'dr', 'outgoing',
-        'fee', 'charge', 'bill', 'invoice'
-    ]
-    
-    lower_text = text.lower()
-    return any(indicator in lower_text for indicator in indicators)
+    return _DEBIT_INDICATORS_RE.search(text.lower()) is not None
@@ -1,17 +1,38 @@
 """
 Date Parser Tool for extracting and normalizing dates from text.
-Uses dateutil.parser for robust date extraction.
+Tries a few exact formats with strptime first and falls back to dateutil.parser for everything else.
 """
 
-from datetime import date
+from datetime import date, datetime
+from functools import lru_cache
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 import re
 from dateutil.parser import parse, ParserError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Common statement and receipt formats, tried in order with strptime before the much slower
+# dateutil parser; month names are matched in the process's LC_TIME locale (English by default)
+_FORMATS = ("%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%B %d, %Y", "%d %b %Y")
+
+# Statements repeat the same few dates, so parse results are memoized per distinct string
+_CACHE_SIZE = 10_000
+
+_TRAILING_PUNCT_RE = re.compile(r'[^\w\s/\-\.]+$')
+
+# Date patterns searched for in free text, compiled once at import
+_DATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    # MM/DD/YYYY or DD/MM/YYYY
+    r'\b\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}\b',
+    # Month name formats: Jan 1, 2022 or January 1, 2022 or 1 Jan 2022
+    r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4}\b',
+    r'\b\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4}\b',
+    # ISO format: YYYY-MM-DD
+    r'\b\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}\b',
+)]
+
 
 def parse_date_robustly(date_str: str) -> Optional[date]:
     """
@@ -26,11 +47,24 @@ def parse_date_robustly(date_str: str) -> Optional[date]:
     if not date_str or not isinstance(date_str, str):
         return None
     
+    return _parse_date_cached(date_str)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_date_cached(date_str: str) -> Optional[date]:
+    """Parse a non-empty date string; see parse_date_robustly."""
     # Clean up the input string
     date_str = date_str.strip()
     
     # Remove any non-alphanumeric characters from the end
-    date_str = re.sub(r'[^\w\s/\-\.]+$', '', date_str)
+    date_str = _TRAILING_PUNCT_RE.sub('', date_str)
+    
+    # Fast path for exact common formats; MM/DD is tried before DD/MM as with dateutil below
+    for fmt in _FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
     
     # Try parsing with dateutil.parser
     try:
@@ -60,26 +94,27 @@ def extract_dates_from_text(text: str) -> list[str]:
     Returns:
         List of potential date strings
     """
-    if not text:
-        return []
+    return list(iter_dates_from_text(text))
+
+
+def iter_dates_from_text(text: str) -> Iterator[str]:
+    """
+    Lazily yield potential date strings from raw text, in the same order as extract_dates_from_text.
     
-    # Common date patterns
-    patterns = [
-        # MM/DD/YYYY or DD/MM/YYYY
-        r'\b\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}\b',
-        # Month name formats: Jan 1, 2022 or January 1, 2022 or 1 Jan 2022
-        r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4}\b',
-        r'\b\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4}\b',
-        # ISO format: YYYY-MM-DD
-        r'\b\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}\b',
-    ]
+    Callers that stop early (e.g. at the first parseable date) skip scanning the rest of the text.
     
-    date_strings = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        date_strings.extend(matches)
+    Args:
+        text: Raw text that may contain dates
+        
+    Yields:
+        Potential date strings
+    """
+    if not text:
+        return
     
-    return date_strings
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            yield match.group(0)
 
 
 def normalize_date_format(date_obj: date, format_str: str) -> str:
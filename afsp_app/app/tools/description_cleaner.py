@@ -5,6 +5,14 @@ Removes common prefixes, normalizes merchant names, and standardizes formatting.
 
 import re
 import logging
+import threading
+from typing import Iterable
+
+try:
+    # Multi-pattern DFA matcher for the category keywords; the regex scan is used without it
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -86,6 +94,120 @@ COMMON_PREFIX_SUFFIX = [
     "AUTHORIZATION CODE",
 ]
 
+# Category mapping based on keywords, checked in order
+CATEGORY_KEYWORDS = [
+    ("Groceries", ["grocery", "supermarket", "market", "food", "kroger", "walmart", "target", 
+                   "trader joe", "whole foods", "safeway", "costco", "aldi"]),
+    ("Dining", ["restaurant", "cafe", "coffee", "starbucks", "mcdonald", "burger", "pizza", 
+                "taco", "sushi", "doordash", "uber eats", "grubhub", "meal", "diner"]),
+    ("Transportation", ["gas", "fuel", "uber", "lyft", "taxi", "transit", "parking", "tolls", 
+                        "metro", "subway", "train", "bus", "airline", "flight"]),
+    ("Utilities", ["electric", "water", "gas bill", "utility", "internet", "phone", "mobile", 
+                   "wifi", "cable", "sewage"]),
+    ("Housing", ["rent", "mortgage", "hoa", "home", "apartment", "insurance", "property"]),
+    ("Entertainment", ["movie", "netflix", "hulu", "disney", "spotify", "theatre", "concert", 
+                       "ticket", "game", "book", "kindle"]),
+    ("Shopping", ["amazon", "ebay", "etsy", "clothing", "fashion", "apparel", "electronics", 
+                  "department", "store"]),
+    ("Health", ["doctor", "medical", "pharmacy", "prescription", "dental", "vision", "fitness", 
+                "gym", "healthcare"]),
+    ("Education", ["tuition", "school", "college", "university", "course", "class", "book", 
+                   "education"]),
+    ("Personal", ["haircut", "salon", "spa", "beauty", "barber"]),
+    ("Gifts/Donations", ["gift", "donation", "charity", "non-profit"]),
+    ("Subscription", ["membership", "subscription", "monthly", "annual fee"]),
+    ("Income", ["salary", "payroll", "deposit", "revenue", "interest", "dividend"]),
+]
+
+_WORD_RE = re.compile(r'\S+')
+
+# (abbreviation, whole-word pattern, full name), compiled once instead of per description
+_MERCHANT_PATTERNS = [
+    (abbrev, re.compile(r'\b' + re.escape(abbrev) + r'\b', re.IGNORECASE), full_name)
+    for abbrev, full_name in MERCHANT_NORMALIZATIONS.items()
+]
+
+# All prefixes/suffixes in one alternation, so a description is scanned once rather than once per entry
+_PREFIX_SUFFIX_RE = re.compile(
+    '(?:' + '|'.join(COMMON_PREFIX_SUFFIX) + ')\\s*', re.IGNORECASE
+)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex matching any of the given words, factored by common prefix like a trie.
+    The regex engine then branches on one character at a time instead of trying every word in turn.
+    
+    Args:
+        words: Literal words to match
+        
+    Returns:
+        Regex source that matches the longest of the words starting at a position
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a word
+    
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    
+    return build(trie)
+
+
+# Keyword -> index of the first category listing it
+_KEYWORD_PRIORITY = {}
+for _index, (_category, _keywords) in enumerate(CATEGORY_KEYWORDS):
+    for _keyword in _keywords:
+        _KEYWORD_PRIORITY.setdefault(_keyword.lower(), _index)
+
+# The trie pattern reports only the longest keyword at each position (e.g. "gas bill", not "gas"),
+# so each keyword takes the best priority of any keyword that is a prefix of it
+_MATCH_PRIORITY = {
+    keyword: min(index for other, index in _KEYWORD_PRIORITY.items() if keyword.startswith(other))
+    for keyword in _KEYWORD_PRIORITY
+}
+
+# All category keywords in one trie-shaped pattern; the lookahead lets keywords overlap.
+# It is matched against the lowercased description, case-sensitively: re's case-insensitive
+# mode also equates characters str.lower() keeps apart (e.g. dotless i or long s).
+_CATEGORY_KEYWORD_RE = re.compile("(?=(" + _trie_pattern(_KEYWORD_PRIORITY) + "))")
+
+
+def _build_hyperscan_db() -> "hyperscan.Database":
+    """
+    Compile every category keyword into one Hyperscan database.
+    
+    Each keyword's id is its category priority, so the lowest id reported is the category to use.
+    The keywords are lowercase ASCII and are scanned for case-sensitively in the UTF-8 encoding of
+    the lowercased description; a multi-byte character never contains an ASCII byte, so byte and
+    character matches agree.
+    
+    Returns:
+        Compiled block-mode database
+    """
+    keywords = list(_KEYWORD_PRIORITY)
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[re.escape(keyword).encode() for keyword in keywords],
+        ids=[_KEYWORD_PRIORITY[keyword] for keyword in keywords],
+        elements=len(keywords),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords),
+    )
+    return db
+
+
+_HS_DB = _build_hyperscan_db() if hyperscan is not None else None
+
+# Hyperscan scratch space can't be shared between concurrent scans, so each thread gets its own
+_hs_local = threading.local()
+
 
 def clean_description(description: str) -> str:
     """
@@ -104,9 +226,7 @@ def clean_description(description: str) -> str:
     description = str(description).strip()
     
     # Remove common bank prefixes/suffixes
-    for prefix in COMMON_PREFIX_SUFFIX:
-        regex = re.compile(f"{prefix}\\s*", re.IGNORECASE)
-        description = regex.sub("", description)
+    description = _PREFIX_SUFFIX_RE.sub("", description)
     
     # Remove transaction IDs, reference numbers, and dates at the end
     description = re.sub(r'\b\d{2}/\d{2}/\d{2,4}\b$', '', description)  # Date at end
@@ -116,32 +236,97 @@ def clean_description(description: str) -> str:
     # Remove extra whitespace (including multiple spaces, tabs, newlines)
     description = re.sub(r'\s+', ' ', description).strip()
     
-    # Normalize merchant names
-    for abbrev, full_name in MERCHANT_NORMALIZATIONS.items():
-        if abbrev in description.upper():
-            description = re.sub(
-                r'\b' + re.escape(abbrev) + r'\b', 
-                full_name, 
-                description, 
-                flags=re.IGNORECASE
-            )
+    # Normalize merchant names; the uppercase form is only rebuilt after a substitution
+    normalized = _normalize(description)
+    for abbrev, pattern, full_name in _MERCHANT_PATTERNS:
+        if abbrev in normalized:
+            description, count = pattern.subn(full_name, description)
+            if count:
+                normalized = _normalize(description)
     
     # Convert to title case for consistency, but preserve common acronyms
-    # Split, capitalize each word, then join
-    words = description.split()
-    capitalized_words = []
-    for word in words:
-        # Check if it's an acronym (all uppercase)
-        if word.isupper() and len(word) > 1:
-            capitalized_words.append(word)  # Keep acronyms as is
-        else:
-            capitalized_words.append(word.capitalize())
-    
-    description = ' '.join(capitalized_words)
+    description = _WORD_RE.sub(_capitalize_word, description)
     
     return description
 
 
+def _normalize(description: str) -> str:
+    """
+    Build the uppercase form of a description that merchant abbreviations are looked up in.
+    
+    Args:
+        description: Description text
+        
+    Returns:
+        Stripped, uppercased description
+    """
+    return description.strip().upper()
+
+
+def _capitalize_word(match: re.Match) -> str:
+    """
+    Capitalize a matched word, keeping acronyms (all uppercase) as is.
+    
+    Args:
+        match: Regex match for a single word
+        
+    Returns:
+        Capitalized word
+    """
+    word = match.group(0)
+    if word.isupper() and len(word) > 1:
+        return word
+    return word.capitalize()
+
+
+def _regex_priority(description: str) -> int:
+    """
+    Find the best category priority among the keywords in a description with _CATEGORY_KEYWORD_RE.
+    
+    Args:
+        description: Transaction description
+        
+    Returns:
+        Index into CATEGORY_KEYWORDS, or len(CATEGORY_KEYWORDS) if no keyword matches
+    """
+    best = len(CATEGORY_KEYWORDS)
+    for match in _CATEGORY_KEYWORD_RE.finditer(description.lower()):
+        best = min(best, _MATCH_PRIORITY[match.group(1)])
+        if best == 0:
+            break
+    return best
+
+
+def _on_hyperscan_match(priority: int, start: int, end: int, flags: int, best: list) -> bool:
+    """Record a keyword match from Hyperscan; returning True stops the scan once nothing can beat it."""
+    if priority < best[0]:
+        best[0] = priority
+    return priority == 0
+
+
+def _hyperscan_priority(description: str) -> int:
+    """
+    Find the best category priority among the keywords in a description with Hyperscan.
+    
+    Args:
+        description: Transaction description
+        
+    Returns:
+        Index into CATEGORY_KEYWORDS, or len(CATEGORY_KEYWORDS) if no keyword matches
+    """
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    
+    best = [len(CATEGORY_KEYWORDS)]
+    try:
+        _HS_DB.scan(description.lower().encode(), match_event_handler=_on_hyperscan_match, context=best, scratch=scratch)
+    except hyperscan.ScanTerminated:
+        # Raised when _on_hyperscan_match stops the scan early
+        pass
+    return best[0]
+
+
 def categorize_description(description: str) -> str:
     """
     Suggest a category based on the description.
@@ -152,38 +337,17 @@ def categorize_description(description: str) -> str:
     Returns:
         Suggested category
     """
-    # Convert to lowercase for matching
-    desc_lower = description.lower()
-    
-    # Category mapping based on keywords
-    categories = [
-        ("Groceries", ["grocery", "supermarket", "market", "food", "kroger", "walmart", "target", 
-                    "trader joe", "whole foods", "safeway", "costco", "aldi"]),
-        ("Dining", ["restaurant", "cafe", "coffee", "starbucks", "mcdonald", "burger", "pizza", 
-                 "taco", "sushi", "doordash", "uber eats", "grubhub", "meal", "diner"]),
-        ("Transportation", ["gas", "fuel", "uber", "lyft", "taxi", "transit", "parking", "tolls", 
-                         "metro", "subway", "train", "bus", "airline", "flight"]),
-        ("Utilities", ["electric", "water", "gas bill", "utility", "internet", "phone", "mobile", 
-                     "wifi", "cable", "sewage"]),
-        ("Housing", ["rent", "mortgage", "hoa", "home", "apartment", "insurance", "property"]),
-        ("Entertainment", ["movie", "netflix", "hulu", "disney", "spotify", "theatre", "concert", 
-                        "ticket", "game", "book", "kindle"]),
-        ("Shopping", ["amazon", "ebay", "etsy", "clothing", "fashion", "apparel", "electronics", 
-                   "department", "store"]),
-        ("Health", ["doctor", "medical", "pharmacy", "prescription", "dental", "vision", "fitness", 
-                 "gym", "healthcare"]),
-        ("Education", ["tuition", "school", "college", "university", "course", "class", "book", 
-                     "education"]),
-        ("Personal", ["haircut", "salon", "spa", "beauty", "barber"]),
-        ("Gifts/Donations", ["gift", "donation", "charity", "non-profit"]),
-        ("Subscription", ["membership", "subscription", "monthly", "annual fee"]),
-        ("Income", ["salary", "payroll", "deposit", "revenue", "interest", "dividend"]),
-    ]
-    
-    # Check for category matches
-    for category, keywords in categories:
-        if any(keyword in desc_lower for keyword in keywords):
-            return category
+    if not description:
+        return "Uncategorized"
+    
+    # Find the highest-priority category with a keyword anywhere in the lowercased description
+    if _HS_DB is not None:
+        best = _hyperscan_priority(description)
+    else:
+        best = _regex_priority(description)
+    
+    if best < len(CATEGORY_KEYWORDS):
+        return CATEGORY_KEYWORDS[best][0]
     
     # Default category if no match found
     return "Uncategorized"
@@ -1,15 +1,29 @@
 """
 OCR Tool for extracting text from images.
-Uses pytesseract as the OCR engine.
+Uses tesserocr as the OCR engine when installed, otherwise pytesseract.
 """
 
 import logging
 import io
-from typing import Optional
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import cv2
+import diskcache
+import numpy as np
 import pytesseract
-from PIL import Image, ImageEnhance
+from PIL import Image
+
+try:
+    # In-process Tesseract bindings; avoids spawning a tesseract process per image
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 from afsp_app.app.config import TESSERACT_PATH
+from afsp_app.app.settings import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,6 +32,18 @@ logger = logging.getLogger(__name__)
 if TESSERACT_PATH:
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
 
+# On-disk cache of OCR results keyed by image content, so re-uploaded images skip Tesseract;
+# opened on the first OCR call so importing this module leaves the filesystem alone
+_ocr_cache: Optional[diskcache.Cache] = None
+_ocr_cache_lock = threading.Lock()
+
+# Process pool for OCR of multi-page documents, created on first use
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+
+# Persistent tesserocr engine, created on first use; the API is not thread-safe
+_tess_api = None
+_tess_api_lock = threading.Lock()
+
 
 def perform_ocr(image_bytes: bytes) -> Optional[str]:
     """
@@ -30,6 +56,13 @@ def perform_ocr(image_bytes: bytes) -> Optional[str]:
         Extracted text or None if extraction failed
     """
     try:
+        # Return the cached result if this exact image was already processed
+        cache_key = _ocr_cache_key(image_bytes)
+        cached_text = _ocr_cache_get(cache_key)
+        if cached_text is not None:
+            logger.info("OCR cache hit")
+            return cached_text
+        
         # Open image using PIL
         image = Image.open(io.BytesIO(image_bytes))
         
@@ -37,12 +70,13 @@ def perform_ocr(image_bytes: bytes) -> Optional[str]:
         image = preprocess_image(image)
         
         # Perform OCR
-        text = pytesseract.image_to_string(image)
+        text = _image_to_string(image)
         
         if not text.strip():
             logger.warning("OCR extracted empty text")
             return None
-            
+        
+        _ocr_cache_set(cache_key, text)
         return text
     
     except pytesseract.TesseractNotFoundError:
@@ -53,6 +87,161 @@ def perform_ocr(image_bytes: bytes) -> Optional[str]:
         return None
 
 
+def perform_ocr_batch(images: List[bytes]) -> List[Optional[str]]:
+    """
+    Extracts text from several images (e.g. the pages of a scanned PDF) in parallel.
+    
+    Args:
+        images: List of raw image data as bytes
+        
+    Returns:
+        List of extracted text (or None on failure), in the same order as the input
+    """
+    # Not worth the process pool round-trip for a single page
+    if len(images) <= 1:
+        return [perform_ocr(image_bytes) for image_bytes in images]
+    
+    try:
+        return list(_get_ocr_executor().map(perform_ocr, images, chunksize=1))
+    except Exception as e:
+        # A worker that died (e.g. out of memory, or a crash inside Tesseract) breaks the whole pool
+        # (BrokenProcessPool); drop it so the next batch gets a fresh one, and OCR these pages here
+        logger.error(f"OCR process pool failed, retrying pages serially: {str(e)}")
+        _reset_ocr_executor()
+        return [perform_ocr(image_bytes) for image_bytes in images]
+
+
+def _image_to_string(image: Image.Image) -> str:
+    """
+    Run Tesseract on a preprocessed image.
+    
+    Uses the LSTM engine only and a fixed page segmentation mode,
+    skipping full layout analysis and the inverted-text pass.
+    
+    Args:
+        image: Preprocessed PIL Image object
+        
+    Returns:
+        Recognized text
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(
+            image,
+            config=f"--oem 1 --psm {settings.OCR_PSM} -c tessedit_do_invert=0"
+        )
+    
+    global _tess_api
+    with _tess_api_lock:
+        if _tess_api is None:
+            _tess_api = tesserocr.PyTessBaseAPI(psm=settings.OCR_PSM, oem=tesserocr.OEM.LSTM_ONLY)
+            _tess_api.SetVariable("tessedit_do_invert", "0")
+        
+        _tess_api.SetImage(image)
+        return _tess_api.GetUTF8Text()
+
+
+def _get_ocr_executor() -> ProcessPoolExecutor:
+    """
+    Get the shared OCR process pool, creating it on first use.
+    
+    Workers are spawned rather than forked, so none of them inherits this process's
+    tesserocr engine, its lock or the open OCR cache; each opens its own on first use.
+    
+    Returns:
+        ProcessPoolExecutor sized by the OCR_WORKERS setting
+    """
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ProcessPoolExecutor(
+            max_workers=settings.OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _ocr_executor
+
+
+def _get_ocr_cache() -> diskcache.Cache:
+    """
+    Get the OCR result cache, opening it on first use.
+    
+    Returns:
+        diskcache.Cache in the OCR_CACHE_DIR directory
+    """
+    global _ocr_cache
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            _ocr_cache = diskcache.Cache(settings.OCR_CACHE_DIR, size_limit=settings.OCR_CACHE_SIZE_LIMIT)
+        return _ocr_cache
+
+
+def _reset_ocr_executor() -> None:
+    """Shut down the shared OCR process pool, so the next call to _get_ocr_executor creates a new one."""
+    global _ocr_executor
+    executor, _ocr_executor = _ocr_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _ocr_cache_get(cache_key: str) -> Optional[str]:
+    """
+    Look up a cached OCR result; cache errors are logged and treated as a miss.
+    
+    Args:
+        cache_key: Key from _ocr_cache_key
+        
+    Returns:
+        Cached text, or None if not cached or the cache is unavailable
+    """
+    try:
+        return _get_ocr_cache().get(cache_key)
+    except Exception as e:
+        # An unwritable, corrupt or locked cache must not stop OCR itself
+        logger.warning(f"OCR cache lookup failed: {str(e)}")
+        return None
+
+
+def _ocr_cache_set(cache_key: str, text: str) -> None:
+    """
+    Store an OCR result in the cache; cache errors are logged and ignored.
+    
+    Args:
+        cache_key: Key from _ocr_cache_key
+        text: Extracted text
+    """
+    try:
+        _get_ocr_cache().set(cache_key, text)
+    except Exception as e:
+        logger.warning(f"OCR cache update failed: {str(e)}")
+
+
+def _ocr_cache_key(image_bytes: bytes) -> str:
+    """
+    Build the OCR cache key for an image.
+    
+    Args:
+        image_bytes: Raw image data as bytes
+        
+    Returns:
+        Content hash of the image combined with the OCR settings that affect the output
+    """
+    digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    return f"{digest}:psm{settings.OCR_PSM}:bin{int(settings.OCR_BINARIZE)}"
+
+
+def _enhance_contrast(gray: np.ndarray) -> np.ndarray:
+    """
+    Double the contrast of a grayscale image around its mean, as ImageEnhance.Contrast(2.0) does.
+    
+    Args:
+        gray: Grayscale image as a uint8 array
+        
+    Returns:
+        Contrast-enhanced uint8 array
+    """
+    # Computed signed and saturated, so dark pixels clamp to 0 rather than folding back up
+    mean = int(gray.mean() + 0.5)
+    return np.clip(2 * gray.astype(np.int16) - mean, 0, 255).astype(np.uint8)
+
+
 def preprocess_image(image: Image.Image) -> Image.Image:
     """
     Preprocess the image to improve OCR quality.
@@ -64,18 +253,22 @@ def preprocess_image(image: Image.Image) -> Image.Image:
         Preprocessed PIL Image object
     """
     try:
-        # Convert to grayscale
-        image = image.convert('L')
+        # Convert to grayscale and work on a single uint8 buffer from here on
+        gray = np.asarray(image.convert('L'))
         
         # Increase contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
+        contrasted = _enhance_contrast(gray)
+        
+        # Increase sharpness with an unsharp mask: 2 * image - blurred
+        blurred = cv2.GaussianBlur(contrasted, (0, 0), 1.0)
+        sharpened = cv2.addWeighted(contrasted, 2.0, blurred, -1.0, 0)
         
-        # Increase sharpness
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(2.0)
+        # Binarize with Otsu's threshold so Tesseract gets a 1-bit image
+        if settings.OCR_BINARIZE:
+            _, binary = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            return Image.fromarray(binary).convert('1', dither=Image.Dither.NONE)
         
-        return image
+        return Image.fromarray(sharpened)
     except Exception as e:
         logger.error(f"Image preprocessing failed: {str(e)}")
         return image  # Return original image if preprocessing fails
@@ -0,0 +1,39 @@
+"""
+Shared helpers for the AFSP test suite.
+"""
+
+import csv
+import io
+from typing import Any, List, Type, TypeVar
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def construct_model(model_cls: Type[ModelT], **fields: Any) -> ModelT:
+    """
+    Build a pydantic model from trusted test literals without running validation.
+    
+    Args:
+        model_cls: Pydantic model class to build
+        **fields: Field values
+        
+    Returns:
+        Model instance with defaults filled in
+    """
+    # Pydantic v2 calls it model_construct; v1 only has construct
+    construct = getattr(model_cls, "model_construct", None) or model_cls.construct
+    return construct(**fields)
+
+
+def assert_csv_equals(actual: str, expected_rows: List[List[str]]) -> None:
+    """
+    Assert that CSV text parses to exactly the expected rows.
+    
+    Args:
+        actual: CSV text to check
+        expected_rows: Expected rows, header included
+    """
+    got = list(csv.reader(io.StringIO(actual, newline='')))
+    assert got == expected_rows
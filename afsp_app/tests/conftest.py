@@ -0,0 +1,50 @@
+"""
+Shared pytest configuration for the AFSP test suite.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.receipt_extractor_agent import ReceiptExtractorAgent
+
+
+# Test modules that share app-level state (database, upload/download dirs) and must not run under xdist
+SERIAL_MODULES = {"test_main_e2e.py"}
+
+
+def pytest_configure(config):
+    """Register the custom markers used by the test suite and deselect slow tests by default."""
+    config.addinivalue_line("markers", "serial: run in a single process (pytest -n0 -m serial)")
+    config.addinivalue_line("markers", "slow: full end-to-end runs, skipped unless selected with -m slow")
+    
+    # Leave slow tests out of the default run; any explicit -m expression takes over
+    if not config.option.markexpr:
+        config.option.markexpr = "not slow"
+
+
+def pytest_collection_modifyitems(config, items):
+    """Mark end-to-end tests as serial so they can be run apart from the parallel unit tests."""
+    for item in items:
+        if item.path.name in SERIAL_MODULES:
+            item.add_marker(pytest.mark.serial)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _use_uvloop():
+    """Run the asyncio tests on uvloop where it is installed (not available on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        yield
+        return
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    yield
+    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+
+
+@pytest.fixture(scope="module")
+def receipt_agent():
+    """A ReceiptExtractorAgent shared by the tests in a module; the agent keeps no per-call state."""
+    return ReceiptExtractorAgent()
@@ -4,6 +4,7 @@ Tests functionality of the specialized receipt processing agent.
 """
 
 import pytest
+import re
 from datetime import date, datetime
 import os
 from pathlib import Path
@@ -13,17 +14,13 @@ from app.schemas import RawTransactionData, ReceiptData, NormalizedTransaction
 from app.agents.receipt_extractor_agent import ReceiptExtractorAgent
 from app.agents.transaction_interpretation_agent import TransactionInterpretationAgent
 
+# The agents parse dates through the afsp_app package, so its date parser cache is the one to clear
+from afsp_app.app.tools import date_parser
 
-class TestReceiptExtractorAgent:
-    """Test suite for ReceiptExtractorAgent."""
-    
-    def test_process_receipt_grocery(self):
-        """Test processing a grocery receipt."""
-        agent = ReceiptExtractorAgent()
-        
-        # Create sample raw data for a grocery receipt
-        raw_data = RawTransactionData(
-            raw_text="""KROGER
+from tests._helpers import construct_model
+
+
+_GROCERY_RECEIPT_TEXT = """KROGER
 123 Main St
 Date: 07/31/2025
 Item         Qty   Price
@@ -36,29 +33,9 @@ Subtotal          16.96
 Tax                0.85
 TOTAL        $17.81
 Thank you for shopping at Kroger!
-""",
-            source_file_name="grocery_receipt.jpg",
-            source_file_type="JPEG"
-        )
-        
-        # Process receipt
-        receipt = agent.process_receipt(raw_data, "path/to/grocery_receipt.jpg")
-        
-        # Validate receipt
-        assert receipt is not None
-        assert "Kroger" in receipt.vendor_name
-        assert receipt.transaction_date == date(2025, 7, 31)
-        assert receipt.total_amount == 17.81
-        assert receipt.currency == "USD"
-        assert receipt.category_suggestion == "Groceries"
-    
-    def test_process_receipt_restaurant(self):
-        """Test processing a restaurant receipt."""
-        agent = ReceiptExtractorAgent()
-        
-        # Create sample raw data for a restaurant receipt
-        raw_data = RawTransactionData(
-            raw_text="""STARBUCKS
+"""
+
+_RESTAURANT_RECEIPT_TEXT = """STARBUCKS
 456 Main St
 July 31, 2025 12:34 PM
 Order #12345
@@ -69,29 +46,9 @@ Subtotal             8.20
 Tax                  0.66
 TOTAL               $8.86
 Thank you for visiting Starbucks!
-""",
-            source_file_name="restaurant_receipt.jpg",
-            source_file_type="JPEG"
-        )
-        
-        # Process receipt
-        receipt = agent.process_receipt(raw_data, "path/to/restaurant_receipt.jpg")
-        
-        # Validate receipt
-        assert receipt is not None
-        assert "Starbucks" in receipt.vendor_name
-        assert receipt.transaction_date == date(2025, 7, 31)
-        assert receipt.total_amount == 8.86
-        assert receipt.currency == "USD"
-        assert receipt.category_suggestion == "Dining"
-    
-    def test_process_receipt_gas(self):
-        """Test processing a gas station receipt."""
-        agent = ReceiptExtractorAgent()
-        
-        # Create sample raw data for a gas station receipt
-        raw_data = RawTransactionData(
-            raw_text="""SHELL GAS
+"""
+
+_GAS_RECEIPT_TEXT = """SHELL GAS
 789 Highway Dr
 07/31/25 15:45
 Pump: 5
@@ -101,60 +58,126 @@ Fuel Total: $43.20
 Car Wash: $8.99
 TOTAL: $52.19
 Thank you for choosing Shell!
-""",
-            source_file_name="gas_receipt.jpg",
-            source_file_type="JPEG"
-        )
-        
+"""
+
+# A long receipt whose total only appears after several hundred line items
+_LARGE_RECEIPT_TEXT = "WAREHOUSE CLUB\n" + "Paper Towels        2     12.99\n" * 500 + "TOTAL        $6495.00\n"
+
+
+@pytest.fixture(scope="module")
+def grocery_raw():
+    """Raw OCR data for the grocery receipt."""
+    return RawTransactionData(
+        raw_text=_GROCERY_RECEIPT_TEXT,
+        source_file_name="grocery_receipt.jpg",
+        source_file_type="JPEG"
+    )
+
+
+class TestReceiptExtractorAgent:
+    """Test suite for ReceiptExtractorAgent."""
+    
+    @pytest.mark.parametrize(
+        "raw_data, expected_vendor, expected_total, expected_category",
+        [
+            pytest.param(
+                RawTransactionData(
+                    raw_text=_GROCERY_RECEIPT_TEXT,
+                    source_file_name="grocery_receipt.jpg",
+                    source_file_type="JPEG"
+                ),
+                "Kroger", 17.81, "Groceries",
+                id="grocery",
+            ),
+            pytest.param(
+                RawTransactionData(
+                    raw_text=_RESTAURANT_RECEIPT_TEXT,
+                    source_file_name="restaurant_receipt.jpg",
+                    source_file_type="JPEG"
+                ),
+                "Starbucks", 8.86, "Dining",
+                id="restaurant",
+            ),
+            pytest.param(
+                RawTransactionData(
+                    raw_text=_GAS_RECEIPT_TEXT,
+                    source_file_name="gas_receipt.jpg",
+                    source_file_type="JPEG"
+                ),
+                "Shell", 52.19, "Transportation",
+                id="gas",
+            ),
+        ],
+    )
+    def test_process_receipt(self, receipt_agent, raw_data, expected_vendor, expected_total, expected_category):
+        """Test processing grocery, restaurant and gas station receipts."""
         # Process receipt
-        receipt = agent.process_receipt(raw_data, "path/to/gas_receipt.jpg")
+        receipt = receipt_agent.process_receipt(raw_data, f"path/to/{raw_data.source_file_name}")
         
         # Validate receipt
         assert receipt is not None
-        assert "Shell" in receipt.vendor_name
+        assert expected_vendor in receipt.vendor_name
         assert receipt.transaction_date == date(2025, 7, 31)
-        assert receipt.total_amount == 52.19
+        assert receipt.total_amount == expected_total
         assert receipt.currency == "USD"
-        assert receipt.category_suggestion == "Transportation"
+        assert receipt.category_suggestion == expected_category
     
-    def test_extract_currency(self):
+    @pytest.mark.parametrize("text, expected", [
+        ("Total: $10.00", "USD"),
+        ("Total: £10.00", "GBP"),
+        ("Total: €10.00", "EUR"),
+        ("Total: 10.00", "USD"),  # Default
+    ])
+    def test_extract_currency(self, receipt_agent, text, expected):
         """Test extracting currency from receipt text."""
-        agent = ReceiptExtractorAgent()
-        
-        # Test USD
-        assert agent._extract_currency("Total: $10.00") == "USD"
-        
-        # Test GBP
-        assert agent._extract_currency("Total: £10.00") == "GBP"
-        
-        # Test EUR
-        assert agent._extract_currency("Total: €10.00") == "EUR"
-        
-        # Test default
-        assert agent._extract_currency("Total: 10.00") == "USD"
+        assert receipt_agent._extract_currency(text) == expected
     
-    def test_suggest_category(self):
+    @pytest.mark.parametrize("vendor_name, line_items, expected", [
+        ("Kroger", [], "Groceries"),
+        ("McDonald's", [], "Dining"),
+        ("Shell Gas", [], "Transportation"),
+        # Based on line items
+        ("Store", [{"item": "Prescription", "price": 10.00}, {"item": "Medicine", "price": 5.00}], "Health"),
+        ("Unknown Store", [], "Uncategorized"),
+    ])
+    def test_suggest_category(self, receipt_agent, vendor_name, line_items, expected):
         """Test suggesting categories based on vendor and items."""
-        agent = ReceiptExtractorAgent()
-        
-        # Test grocery
-        assert agent._suggest_category("Kroger", []) == "Groceries"
-        
-        # Test dining
-        assert agent._suggest_category("McDonald's", []) == "Dining"
+        assert receipt_agent._suggest_category(vendor_name, line_items) == expected
+    
+    def test_date_parser_is_strptime_based(self, monkeypatch, request, receipt_agent):
+        """Test that common date formats never reach the dateutil fallback."""
+        # Dates cached by earlier tests would skip the parser entirely
+        date_parser._parse_date_cached.cache_clear()
+        request.addfinalizer(date_parser._parse_date_cached.cache_clear)
         
-        # Test transportation
-        assert agent._suggest_category("Shell Gas", []) == "Transportation"
+        def fail_parse(*args, **kwargs):
+            pytest.fail("dateutil.parser.parse should not be called for common formats")
+        monkeypatch.setattr("afsp_app.app.tools.date_parser.parse", fail_parse)
         
-        # Test based on line items
-        line_items = [
-            {"item": "Prescription", "price": 10.00},
-            {"item": "Medicine", "price": 5.00}
-        ]
-        assert agent._suggest_category("Store", line_items) == "Health"
+        raw_data = RawTransactionData(
+            raw_text="CORNER STORE\nDate: 07/31/2025\nTOTAL $5.00",
+            source_file_name="receipt.jpg",
+            source_file_type="JPEG"
+        )
+        receipt = receipt_agent.process_receipt(raw_data, "path/to/receipt.jpg")
         
-        # Test uncategorized
-        assert agent._suggest_category("Unknown Store", []) == "Uncategorized"
+        assert receipt is not None
+        assert receipt.transaction_date == date(2025, 7, 31)
+    
+    def test_patterns_are_precompiled(self):
+        """Test that the agent's regexes are compiled once at class level."""
+        assert isinstance(ReceiptExtractorAgent._DATE_LIKE_RE, re.Pattern)
+        assert all(isinstance(p, re.Pattern) for p in ReceiptExtractorAgent._TOTAL_PATTERNS)
+    
+    def test_process_receipt_grocery_benchmark(self, benchmark, receipt_agent, grocery_raw):
+        """Benchmark processing the grocery receipt end to end."""
+        receipt = benchmark(receipt_agent.process_receipt, grocery_raw, "path/to/grocery_receipt.jpg")
+        assert receipt.transaction_date == date(2025, 7, 31)
+        assert receipt.category_suggestion == "Groceries"
+    
+    def test_extract_total_amount_benchmark(self, benchmark, receipt_agent):
+        """Benchmark total extraction on a long receipt."""
+        assert benchmark(receipt_agent._extract_total_amount, _LARGE_RECEIPT_TEXT) == 6495.00
 
 
 class TestReceiptToNormalizedTransaction:
@@ -163,7 +186,8 @@ class TestReceiptToNormalizedTransaction:
     def test_convert_receipt_to_transaction(self):
         """Test converting a receipt to a normalized transaction."""
         # Create a receipt
-        receipt = ReceiptData(
+        receipt = construct_model(
+            ReceiptData,
             vendor_name="Starbucks",
             transaction_date=date(2025, 7, 31),
             total_amount=8.86,
@@ -178,7 +202,8 @@ class TestReceiptToNormalizedTransaction:
         )
         
         # Convert to normalized transaction (manual implementation for testing)
-        transaction = NormalizedTransaction(
+        transaction = construct_model(
+            NormalizedTransaction,
             date=receipt.transaction_date,
             description=receipt.vendor_name,
             amount=-receipt.total_amount,  # Negative for expenses
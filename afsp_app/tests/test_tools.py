@@ -5,32 +5,42 @@ Tests functionality of the individual tools used by agents.
 
 import pytest
 from datetime import date, datetime
+import io
+import math
 import os
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
-from app.tools.date_parser import parse_date_robustly, extract_dates_from_text, normalize_date_format
-from app.tools.amount_parser import parse_amount_and_type, extract_numeric_amount
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from app.tools.date_parser import parse_date_robustly, extract_dates_from_text, iter_dates_from_text, normalize_date_format
+from app.tools.amount_parser import parse_amount_and_type, extract_numeric_amount, _scan_plain_amount
+from app.tools import description_cleaner
 from app.tools.description_cleaner import clean_description, categorize_description
+from app.tools import ocr_tool
+from app.tools.ocr_tool import _enhance_contrast
 
 
 class TestDateParser:
     """Test suite for date parser tool."""
     
-    def test_parse_date_robustly(self):
+    @pytest.mark.parametrize("date_str, expected", [
+        # Standard formats
+        ("07/31/2025", date(2025, 7, 31)),
+        ("31/07/2025", date(2025, 7, 31)),
+        ("2025-07-31", date(2025, 7, 31)),
+        # With text
+        ("Date: July 31, 2025", date(2025, 7, 31)),
+        ("31 Jul 2025", date(2025, 7, 31)),
+        # Invalid dates
+        ("not a date", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_parse_date_robustly(self, date_str, expected):
         """Test parsing dates in various formats."""
-        # Test standard formats
-        assert parse_date_robustly("07/31/2025") == date(2025, 7, 31)
-        assert parse_date_robustly("31/07/2025") == date(2025, 7, 31)
-        assert parse_date_robustly("2025-07-31") == date(2025, 7, 31)
-        
-        # Test with text
-        assert parse_date_robustly("Date: July 31, 2025") == date(2025, 7, 31)
-        assert parse_date_robustly("31 Jul 2025") == date(2025, 7, 31)
-        
-        # Test invalid dates
-        assert parse_date_robustly("not a date") is None
-        assert parse_date_robustly("") is None
-        assert parse_date_robustly(None) is None
+        assert parse_date_robustly(date_str) == expected
     
     def test_extract_dates_from_text(self):
         """Test extracting date strings from text."""
@@ -41,125 +51,205 @@ class TestDateParser:
         assert "07/31/2025" in dates
         assert "08/01/2025" in dates
         assert "January 15, 2025" in dates
+    
+    @pytest.mark.parametrize("text", ["No dates in this text", "", None])
+    def test_extract_dates_from_text_without_dates(self, text):
+        """Test extracting date strings from text with no dates."""
+        assert extract_dates_from_text(text) == []
+        assert list(iter_dates_from_text(text)) == []
+    
+    def test_iter_dates_from_text(self):
+        """Test that iterating dates yields the extracted dates in order, one at a time."""
+        text = "Transaction date: 07/31/2025. Posted on 08/01/2025. Receipt from January 15, 2025."
+        dates = iter_dates_from_text(text)
         
-        # Test with no dates
-        assert extract_dates_from_text("No dates in this text") == []
-        
-        # Test with empty text
-        assert extract_dates_from_text("") == []
-        assert extract_dates_from_text(None) == []
+        assert next(dates) == "07/31/2025"
+        assert ["07/31/2025", *dates] == extract_dates_from_text(text)
     
-    def test_normalize_date_format(self):
+    @pytest.mark.parametrize("date_obj, format_str, expected", [
+        (date(2025, 7, 31), "MM/DD/YYYY", "07/31/2025"),
+        (date(2025, 7, 31), "DD/MM/YYYY", "31/07/2025"),
+        (date(2025, 7, 31), "invalid", "07/31/2025"),  # Falls back to MM/DD/YYYY
+        (None, "MM/DD/YYYY", ""),
+    ])
+    def test_normalize_date_format(self, date_obj, format_str, expected):
         """Test normalizing date format."""
-        test_date = date(2025, 7, 31)
-        
-        # Test MM/DD/YYYY format
-        assert normalize_date_format(test_date, "MM/DD/YYYY") == "07/31/2025"
-        
-        # Test DD/MM/YYYY format
-        assert normalize_date_format(test_date, "DD/MM/YYYY") == "31/07/2025"
-        
-        # Test invalid format
-        assert normalize_date_format(test_date, "invalid") == "07/31/2025"
-        
-        # Test None date
-        assert normalize_date_format(None, "MM/DD/YYYY") == ""
+        assert normalize_date_format(date_obj, format_str) == expected
 
 
 class TestAmountParser:
     """Test suite for amount parser tool."""
     
-    def test_parse_amount_and_type(self):
+    @pytest.mark.parametrize("args, expected_amount, expected_type", [
+        # Combined amount string
+        (("$123.45",), -123.45, "Debit"),  # Default to debit
+        # Negative amount string
+        (("-$123.45",), -123.45, "Debit"),
+        # Credit indicators
+        (("Credit: $123.45",), 123.45, "Credit"),
+        # Debit indicators
+        (("Debit: $123.45",), -123.45, "Debit"),
+        # Separate credit/debit columns
+        ((None, "$123.45", None), 123.45, "Credit"),
+        ((None, None, "$123.45"), -123.45, "Debit"),
+        # Invalid inputs
+        (("not an amount",), None, None),
+    ])
+    def test_parse_amount_and_type(self, args, expected_amount, expected_type):
         """Test parsing amounts and determining transaction type."""
-        # Test with combined amount string
-        amount, type_ = parse_amount_and_type("$123.45")
-        assert amount == -123.45  # Default to debit
-        assert type_ == "Debit"
-        
-        # Test with negative amount string
-        amount, type_ = parse_amount_and_type("-$123.45")
-        assert amount == -123.45
-        assert type_ == "Debit"
-        
-        # Test with credit indicators
-        amount, type_ = parse_amount_and_type("Credit: $123.45")
-        assert amount == 123.45
-        assert type_ == "Credit"
-        
-        # Test with debit indicators
-        amount, type_ = parse_amount_and_type("Debit: $123.45")
-        assert amount == -123.45
-        assert type_ == "Debit"
-        
-        # Test with separate credit/debit columns
-        amount, type_ = parse_amount_and_type(None, "$123.45", None)
-        assert amount == 123.45
-        assert type_ == "Credit"
-        
-        amount, type_ = parse_amount_and_type(None, None, "$123.45")
-        assert amount == -123.45
-        assert type_ == "Debit"
-        
-        # Test with invalid inputs
-        amount, type_ = parse_amount_and_type("not an amount")
-        assert amount is None
-        assert type_ is None
+        amount, type_ = parse_amount_and_type(*args)
+        assert amount == expected_amount
+        assert type_ == expected_type
     
-    def test_extract_numeric_amount(self):
+    @pytest.mark.parametrize("amount_str, expected", [
+        # US format
+        ("$123.45", 123.45),
+        ("$1,234.56", 1234.56),
+        # European format
+        ("123,45", 123.45),
+        ("1.234,56", 1234.56),
+        # Negative amounts
+        ("-123.45", -123.45),
+        ("($123.45)", -123.45),
+        # Blanks around or inside the number
+        ("$ 1 234.56", 1234.56),
+        ("\u00a0$12.00\t", 12.0),
+        ("( $ 5.00 )", -5.0),
+        # Invalid inputs
+        ("not a number", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_extract_numeric_amount(self, amount_str, expected):
         """Test extracting numeric amounts from strings."""
-        # Test US format
-        assert extract_numeric_amount("$123.45") == 123.45
-        assert extract_numeric_amount("$1,234.56") == 1234.56
-        
-        # Test European format
-        assert extract_numeric_amount("123,45") == 123.45
-        assert extract_numeric_amount("1.234,56") == 1234.56
-        
-        # Test negative amounts
-        assert extract_numeric_amount("-123.45") == -123.45
-        assert extract_numeric_amount("($123.45)") == -123.45
-        
-        # Test invalid inputs
-        assert extract_numeric_amount("not a number") is None
-        assert extract_numeric_amount("") is None
-        assert extract_numeric_amount(None) is None
+        assert extract_numeric_amount(amount_str) == expected
+    
+    @pytest.mark.parametrize("amount_str, expected", [
+        # Plain amounts are parsed
+        ("$1,234.56", 1234.56),
+        ("-$123.45", -123.45),
+        ("$-0.10", -0.10),
+        ("($123.45)", -123.45),
+        ("1,234", 1234.0),
+        # Everything else is declined
+        ("1.234,56", math.nan),
+        ("$ 12.00", math.nan),
+        ("-$-5", math.nan),
+        ("1,23", math.nan),
+        ("1234567890123456", math.nan),
+    ])
+    def test_scan_plain_amount(self, amount_str, expected):
+        """Test the single-pass parser behind the JIT fast path."""
+        amount = _scan_plain_amount(np.frombuffer(amount_str.encode("ascii"), dtype=np.uint8))
+        if math.isnan(expected):
+            assert math.isnan(amount)
+        else:
+            assert amount == expected
 
 
 class TestDescriptionCleaner:
     """Test suite for description cleaner tool."""
     
-    def test_clean_description(self):
+    @pytest.mark.parametrize("description, expected", [
+        # Removing prefixes
+        ("POS TRANSACTION Amazon", "Amazon"),
+        ("DEBIT CARD PURCHASE WALMART", "Walmart"),
+        # Normalizing merchant names
+        ("AMZN MKTP US", "Amazon Marketplace Us"),
+        ("WM SUPERCENTER", "Walmart"),
+        # Removing transaction IDs
+        ("STARBUCKS #12345", "Starbucks"),
+        ("UBER EATS REF #987654", "Uber Eats"),
+        # Empty input
+        ("", ""),
+        (None, ""),
+    ])
+    def test_clean_description(self, description, expected):
         """Test cleaning transaction descriptions."""
-        # Test removing prefixes
-        assert clean_description("POS TRANSACTION Amazon") == "Amazon"
-        assert clean_description("DEBIT CARD PURCHASE WALMART") == "Walmart"
-        
-        # Test normalizing merchant names
-        assert clean_description("AMZN MKTP US") == "Amazon Marketplace Us"
-        assert clean_description("WM SUPERCENTER") == "Walmart"
-        
-        # Test removing transaction IDs
-        assert clean_description("STARBUCKS #12345") == "Starbucks"
-        assert clean_description("UBER EATS REF #987654") == "Uber Eats"
-        
-        # Test with empty input
-        assert clean_description("") == ""
-        assert clean_description(None) == ""
+        assert clean_description(description) == expected
     
-    def test_categorize_description(self):
+    @pytest.mark.parametrize("description, expected", [
+        # Grocery category
+        ("Walmart Grocery", "Groceries"),
+        ("Kroger", "Groceries"),
+        # Dining category
+        ("Starbucks", "Dining"),
+        ("McDonald's", "Dining"),
+        # Transportation category
+        ("Shell Gas", "Transportation"),
+        ("Uber", "Transportation"),
+        # Uncategorized
+        ("Some Random Store", "Uncategorized"),
+        ("", "Uncategorized"),
+        (None, "Uncategorized"),
+    ])
+    def test_categorize_description(self, description, expected):
         """Test categorizing descriptions."""
-        # Test grocery category
-        assert categorize_description("Walmart Grocery") == "Groceries"
-        assert categorize_description("Kroger") == "Groceries"
+        assert categorize_description(description) == expected
+    
+    @pytest.mark.parametrize("description, expected", [
+        # Dotless i lowercases to itself, so "mcdonald" still matches but "market" does not
+        ("mcdonald\u0131", "Dining"),
+        ("McDonald\u0131", "Dining"),
+        # Long s is not a lowercase s
+        ("\u017ftore", "Uncategorized"),
+        # Dotted capital I lowercases to "i" plus a combining dot
+        ("WIF\u0130", "Utilities"),
+    ])
+    def test_categorize_description_non_ascii_case(self, description, expected):
+        """Test that keywords are matched as in the lowercased description, not case-insensitively."""
+        assert categorize_description(description) == expected
+    
+    @pytest.mark.parametrize("description", [
+        "Walmart Grocery", "Shell Gas", "Electric Gas Bill", "UBER EATS", "Some Random Store", "Non-Profit Gift",
+        "McDonald\u0131", "\u017ftore", "WIF\u0130",
+    ])
+    def test_hyperscan_matches_regex_scan(self, description):
+        """Test that the Hyperscan keyword scan picks the same category as the regex scan."""
+        pytest.importorskip("hyperscan")
+        assert description_cleaner._hyperscan_priority(description) == description_cleaner._regex_priority(description)
+
+
+class TestOcrTool:
+    """Test suite for OCR tool image preprocessing."""
+    
+    def test_enhance_contrast_matches_pil(self):
+        """Test that the contrast step gives the same pixels as PIL's ImageEnhance.Contrast(2.0)."""
+        # Black text on a near-white page, so the mean sits far above the text pixels
+        gray = np.full((60, 200), 223, dtype=np.uint8)
+        gray[20:40, 10:190:4] = 0
+        gray[20:40, 11:190:4] = 40
+        
+        expected = np.asarray(ImageEnhance.Contrast(Image.fromarray(gray)).enhance(2.0))
+        contrasted = _enhance_contrast(gray)
+        
+        assert contrasted[20, 10] == 0
+        np.testing.assert_array_equal(contrasted, expected)
+    
+    def test_perform_ocr_batch_recovers_from_broken_pool(self, monkeypatch):
+        """Test that a broken process pool is discarded and the pages are OCR'd serially."""
+        class BrokenExecutor:
+            def map(self, *args, **kwargs):
+                raise BrokenProcessPool("A worker process terminated abruptly")
+            
+            def shutdown(self, **kwargs):
+                pass
+        
+        monkeypatch.setattr(ocr_tool, "_ocr_executor", BrokenExecutor())
+        monkeypatch.setattr(ocr_tool, "perform_ocr", lambda image_bytes: image_bytes.decode())
+        
+        assert ocr_tool.perform_ocr_batch([b"page 1", b"page 2"]) == ["page 1", "page 2"]
+        assert ocr_tool._ocr_executor is None
+    
+    def test_perform_ocr_without_cache(self, monkeypatch):
+        """Test that OCR still runs and returns its text when the cache cannot be opened."""
+        def unavailable_cache():
+            raise OSError("Cache directory could not be created")
         
-        # Test dining category
-        assert categorize_description("Starbucks") == "Dining"
-        assert categorize_description("McDonald's") == "Dining"
+        monkeypatch.setattr(ocr_tool, "_get_ocr_cache", unavailable_cache)
+        monkeypatch.setattr(ocr_tool, "_image_to_string", lambda image: "TOTAL 12.34")
         
-        # Test transportation category
-        assert categorize_description("Shell Gas") == "Transportation"
-        assert categorize_description("Uber") == "Transportation"
+        image_bytes = io.BytesIO()
+        Image.new("L", (40, 20), 255).save(image_bytes, format="PNG")
         
-        # Test uncategorized
-        assert categorize_description("Some Random Store") == "Uncategorized"
-        assert categorize_description("") == "Uncategorized"
+        assert ocr_tool.perform_ocr(image_bytes.getvalue()) == "TOTAL 12.34"
@@ -5,9 +5,15 @@ Test if the user exists in the database with the token's subject ID
 import sys
 import asyncio
 import jwt
+from functools import lru_cache
 from sqlalchemy import select
 from afsp_app.app.database import async_session_maker, User
 
+@lru_cache(maxsize=1024)
+def _decode_unverified(token: str) -> dict:
+    """Decode a JWT payload without verifying its signature; the cached dict is shared, so treat it as read-only"""
+    return jwt.decode(token, options={'verify_signature': False})
+
 async def check_user_in_db():
     """Check if the user from the token actually exists in the database"""
     # Token from our test
@@ -15,7 +21,7 @@ async def check_user_in_db():
     
     # Decode token to get user ID
     try:
-        payload = jwt.decode(token, options={'verify_signature': False})
+        payload = _decode_unverified(token)
         user_id = payload['sub']
         print(f"Token user ID: {user_id}")
         print(f"Token user ID type: {type(user_id)}")
@@ -25,9 +31,8 @@ async def check_user_in_db():
     
     # Check if user exists in database
     async with async_session_maker() as session:
-        # Try to find user by ID
-        result = await session.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        # Look the user up by primary key; a hit in the identity map skips the SELECT
+        user = await session.get(User, user_id)
         
         if user:
             print(f"✅ User found in database:")
@@ -40,11 +45,14 @@ async def check_user_in_db():
             print(f"❌ User NOT found in database")
             
             # List all users to see what's in the database
-            all_users_result = await session.execute(select(User))
-            all_users = all_users_result.scalars().all()
-            print(f"All users in database ({len(all_users)}):")
-            for u in all_users:
+            # Rows are streamed in batches rather than loaded all at once
+            all_users = await session.stream_scalars(select(User).execution_options(yield_per=100))
+            print("All users in database:")
+            user_count = 0
+            async for u in all_users:
                 print(f"  - ID: {u.id} (type: {type(u.id)}), Email: {u.email}")
+                user_count += 1
+            print(f"Total users: {user_count}")
             return False
 
 if __name__ == "__main__":
@@ -2,40 +2,16 @@
 """
 Complete authentication test with a fresh user from scratch
 """
-import urllib.request
-import urllib.parse
-import json
 import sys
 import time
 
-def make_request(url, method="GET", data=None, headers=None):
-    """Make HTTP request using urllib"""
-    if headers is None:
-        headers = {}
-    
-    if data is not None:
-        if isinstance(data, dict):
-            if headers.get('Content-Type') == 'application/json':
-                data = json.dumps(data).encode('utf-8')
-                headers['Content-Type'] = 'application/json'
-            else:
-                data = urllib.parse.urlencode(data).encode('utf-8')
-                headers['Content-Type'] = 'application/x-www-form-urlencoded'
-    
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-    
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            return response.getcode(), response.read().decode('utf-8')
-    except urllib.error.HTTPError as e:
-        return e.code, e.read().decode('utf-8')
-    except Exception as e:
-        return None, str(e)
+import orjson
+
+from _http_client import request
 
 def test_complete_flow():
     """Test complete authentication flow with a fresh user"""
     print("=== Complete Authentication Test ===")
-    base_url = "http://localhost:8000"
     
     # Use timestamp to ensure unique email
     timestamp = str(int(time.time()))
@@ -51,9 +27,9 @@ def test_complete_flow():
         "email": email,
         "password": password
     }
-    reg_status, reg_response = make_request(
-        f"{base_url}/auth/register",
-        method="POST",
+    reg_status, reg_response = request(
+        "POST",
+        "/auth/register",
         data=register_data,
         headers={'Content-Type': 'application/json'}
     )
@@ -62,7 +38,7 @@ def test_complete_flow():
         print(f"Registration failed: {reg_response}")
         return False
     
-    reg_data = json.loads(reg_response)
+    reg_data = orjson.loads(reg_response)
     user_id = reg_data.get('id')
     print(f"User ID: {user_id}")
     print()
@@ -73,9 +49,9 @@ def test_complete_flow():
         "username": email,
         "password": password
     }
-    login_status, login_response = make_request(
-        f"{base_url}/auth/jwt/login",
-        method="POST",
+    login_status, login_response = request(
+        "POST",
+        "/auth/jwt/login",
         data=login_data
     )
     print(f"Login: {login_status}")
@@ -83,7 +59,7 @@ def test_complete_flow():
         print(f"Login failed: {login_response}")
         return False
     
-    login_data = json.loads(login_response)
+    login_data = orjson.loads(login_response)
     token = login_data.get("access_token")
     print(f"Token received (length: {len(token) if token else 0})")
     print()
@@ -91,8 +67,9 @@ def test_complete_flow():
     # Step 3: Test protected endpoint with unverified user
     print("Step 3: Testing /users/me with unverified user...")
     headers = {"Authorization": f"Bearer {token}"}
-    me_status, me_response = make_request(
-        f"{base_url}/users/me",
+    me_status, me_response = request(
+        "GET",
+        "/users/me",
         headers=headers
     )
     print(f"Protected endpoint: {me_status}")
@@ -2,62 +2,38 @@
 """
 Debug authentication test to trace the exact issue
 """
-import urllib.request
-import urllib.parse
-import json
+import asyncio
 import sys
 
-def make_request_debug(url, method="GET", data=None, headers=None):
-    """Make HTTP request with debug output"""
-    if headers is None:
-        headers = {}
-    
-    print(f"Making {method} request to: {url}")
-    print(f"Headers: {headers}")
-    
-    if data is not None:
-        if isinstance(data, dict):
-            if headers.get('Content-Type') == 'application/json':
-                data = json.dumps(data).encode('utf-8')
-                headers['Content-Type'] = 'application/json'
-            else:
-                data = urllib.parse.urlencode(data).encode('utf-8')
-                headers['Content-Type'] = 'application/x-www-form-urlencoded'
-        print(f"Data: {data}")
-    
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-    
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            response_data = response.read().decode('utf-8')
-            print(f"Response code: {response.getcode()}")
-            print(f"Response headers: {dict(response.headers)}")
-            print(f"Response body: {response_data}")
-            return response.getcode(), response_data
-    except urllib.error.HTTPError as e:
-        error_data = e.read().decode('utf-8')
-        print(f"HTTP Error code: {e.code}")
-        print(f"Error headers: {dict(e.headers)}")
-        print(f"Error body: {error_data}")
-        return e.code, error_data
-    except Exception as e:
-        print(f"Request failed: {e}")
-        return None, str(e)
+import orjson
+
+from _http_client import open_async_client, request, run_async
+
+async def probe_auth_formats(auth_formats):
+    """Request /users/me once per Authorization header value, all concurrently"""
+    async with open_async_client() as client:
+        async def probe(auth_header):
+            try:
+                response = await client.get("/users/me", headers={"Authorization": auth_header})
+                return response.status_code, response.text
+            except Exception as e:
+                return None, str(e)
+        
+        return await asyncio.gather(*[probe(auth_header) for auth_header in auth_formats])
 
 def test_me_endpoint():
     """Debug the /users/me endpoint specifically"""
-    base_url = "http://localhost:8000"
-    
     # First login to get a fresh token
     print("=== Getting fresh login token ===")
     login_data = {
         "username": "newuser@example.com",
         "password": "newpass123"
     }
-    login_status, login_response = make_request_debug(
-        f"{base_url}/auth/jwt/login",
-        method="POST",
-        data=login_data
+    login_status, login_response = request(
+        "POST",
+        "/auth/jwt/login",
+        data=login_data,
+        debug=True
     )
     
     if login_status != 200:
@@ -66,7 +42,7 @@ def test_me_endpoint():
     
     # Extract token
     try:
-        login_json = json.loads(login_response)
+        login_json = orjson.loads(login_response)
         token = login_json.get("access_token")
     except:
         print("Failed to parse login response")
@@ -87,13 +63,13 @@ def test_me_endpoint():
         f"JWT {token}",  # JWT prefix
     ]
     
-    for i, auth_header in enumerate(auth_formats):
+    # The probes are independent, so they are sent together and reported in order
+    results = run_async(probe_auth_formats, auth_formats)
+    
+    for i, (auth_header, (me_status, me_response)) in enumerate(zip(auth_formats, results)):
         print(f"\n--- Test {i+1}: Authorization header = '{auth_header}' ---")
-        headers = {"Authorization": auth_header}
-        me_status, me_response = make_request_debug(
-            f"{base_url}/users/me",
-            headers=headers
-        )
+        print(f"Response code: {me_status}")
+        print(f"Response body: {me_response}")
         
         if me_status == 200:
             print("✅ SUCCESS!")
@@ -3,87 +3,80 @@
 Phase 2.4 Authentication Testing Script
 Tests all three authentication endpoints to verify fixes
 """
-import httpx
 import json
 import sys
 
+from _http_client import open_client
+
 def test_authentication():
     """Test all authentication endpoints"""
     print("=== Phase 2.4 Authentication Testing ===")
     print("Testing all three authentication endpoints after fixes")
     print()
     
-    base_url = "http://localhost:8000"
-    
-    # Test 1: Registration
-    print("1. Testing user registration...")
-    try:
-        register_data = {
-            "email": "testuser@example.com",
-            "password": "testpass123"
-        }
-        register_response = httpx.post(
-            f"{base_url}/auth/register",
-            json=register_data,
-            timeout=10
-        )
-        print(f"Registration Status Code: {register_response.status_code}")
-        print(f"Registration Response: {register_response.text}")
-        print()
-    except Exception as e:
-        print(f"Registration failed with error: {e}")
-        register_response = None
-    
-    # Test 2: Login
-    print("2. Testing user login...")
-    try:
-        login_data = {
-            "username": "testuser@example.com",
-            "password": "testpass123"
-        }
-        login_response = httpx.post(
-            f"{base_url}/auth/jwt/login",
-            data=login_data,  # form data, not json
-            timeout=10
-        )
-        print(f"Login Status Code: {login_response.status_code}")
-        print(f"Login Response: {login_response.text}")
-        
-        # Extract token
-        token = None
-        if login_response.status_code == 200:
-            try:
-                login_json = login_response.json()
-                token = login_json.get("access_token")
-                print(f"Extracted Token: {token[:50] if token else 'None'}...")
-            except:
-                print("Failed to parse login response as JSON")
-        print()
-    except Exception as e:
-        print(f"Login failed with error: {e}")
-        login_response = None
-        token = None
+    # One client for all three requests: a keep-alive connection to the server,
+    # or the app itself when AFSP_IN_PROCESS=1
+    with open_client() as client:
+        # Test 1: Registration
+        print("1. Testing user registration...")
+        try:
+            register_data = {
+                "email": "testuser@example.com",
+                "password": "testpass123"
+            }
+            register_response = client.post("/auth/register", json=register_data)
+            print(f"Registration Status Code: {register_response.status_code}")
+            print(f"Registration Response: {register_response.text}")
+            print()
+        except Exception as e:
+            print(f"Registration failed with error: {e}")
+            register_response = None
     
-    # Test 3: Protected endpoint
-    print("3. Testing protected endpoint (/users/me)...")
-    if token:
+        # Test 2: Login
+        print("2. Testing user login...")
         try:
-            headers = {"Authorization": f"Bearer {token}"}
-            me_response = httpx.get(
-                f"{base_url}/users/me",
-                headers=headers,
-                timeout=10
+            login_data = {
+                "username": "testuser@example.com",
+                "password": "testpass123"
+            }
+            login_response = client.post(
+                "/auth/jwt/login",
+                data=login_data  # form data, not json
             )
-            print(f"Protected Endpoint Status Code: {me_response.status_code}")
-            print(f"Protected Endpoint Response: {me_response.text}")
+            print(f"Login Status Code: {login_response.status_code}")
+            print(f"Login Response: {login_response.text}")
+        
+            # Extract token
+            token = None
+            if login_response.status_code == 200:
+                try:
+                    login_json = login_response.json()
+                    token = login_json.get("access_token")
+                    print(f"Extracted Token: {token[:50] if token else 'None'}...")
+                except:
+                    print("Failed to parse login response as JSON")
             print()
         except Exception as e:
-            print(f"Protected endpoint failed with error: {e}")
+            print(f"Login failed with error: {e}")
+            login_response = None
+            token = None
+    
+        # Test 3: Protected endpoint
+        print("3. Testing protected endpoint (/users/me)...")
+        if token:
+            try:
+                headers = {"Authorization": f"Bearer {token}"}
+                me_response = client.get("/users/me", headers=headers)
+                print(f"Protected Endpoint Status Code: {me_response.status_code}")
+                print(f"Protected Endpoint Response: {me_response.text}")
+                print()
+            except Exception as e:
+                print(f"Protected endpoint failed with error: {e}")
+                me_response = None
+        else:
+            print("No token available - login failed")
             me_response = None
-    else:
-        print("No token available - login failed")
-        me_response = None
-        print()
+            print()
     
     # Summary
     print("=== TEST SUMMARY ===")
@@ -3,34 +3,11 @@
 Phase 2.4 Authentication Testing Script
 Tests all three authentication endpoints to verify fixes
 """
-import urllib.request
-import urllib.parse
-import json
 import sys
 
-def make_request(url, method="GET", data=None, headers=None):
-    """Make HTTP request using urllib"""
-    if headers is None:
-        headers = {}
-    
-    if data is not None:
-        if isinstance(data, dict):
-            if headers.get('Content-Type') == 'application/json':
-                data = json.dumps(data).encode('utf-8')
-                headers['Content-Type'] = 'application/json'
-            else:
-                data = urllib.parse.urlencode(data).encode('utf-8')
-                headers['Content-Type'] = 'application/x-www-form-urlencoded'
-    
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-    
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            return response.getcode(), response.read().decode('utf-8')
-    except urllib.error.HTTPError as e:
-        return e.code, e.read().decode('utf-8')
-    except Exception as e:
-        return None, str(e)
+import orjson
+
+from _http_client import request
 
 def test_authentication():
     """Test all authentication endpoints"""
@@ -38,17 +15,15 @@ def test_authentication():
     print("Testing all three authentication endpoints after fixes")
     print()
     
-    base_url = "http://localhost:8000"
-    
     # Test 1: Registration
     print("1. Testing user registration...")
     register_data = {
         "email": "newuser@example.com",
         "password": "newpass123"
     }
-    reg_status, reg_response = make_request(
-        f"{base_url}/auth/register",
-        method="POST",
+    reg_status, reg_response = request(
+        "POST",
+        "/auth/register",
         data=register_data,
         headers={'Content-Type': 'application/json'}
     )
@@ -62,9 +37,9 @@ def test_authentication():
         "username": "newuser@example.com",
         "password": "newpass123"
     }
-    login_status, login_response = make_request(
-        f"{base_url}/auth/jwt/login",
-        method="POST",
+    login_status, login_response = request(
+        "POST",
+        "/auth/jwt/login",
         data=login_data
     )
     print(f"Login Status Code: {login_status}")
@@ -74,7 +49,7 @@ def test_authentication():
     token = None
     if login_status == 200:
         try:
-            login_json = json.loads(login_response)
+            login_json = orjson.loads(login_response)
             token = login_json.get("access_token")
             print(f"Extracted Token: {token[:50] if token else 'None'}...")
         except:
@@ -85,8 +60,9 @@ def test_authentication():
     print("3. Testing protected endpoint (/users/me)...")
     if token:
         headers = {"Authorization": f"Bearer {token}"}
-        me_status, me_response = make_request(
-            f"{base_url}/users/me",
+        me_status, me_response = request(
+            "GET",
+            "/users/me",
             headers=headers
         )
         print(f"Protected Endpoint Status Code: {me_status}")
@@ -4,7 +4,7 @@ Verify the user and test authentication again
 """
 import sys
 import asyncio
-from sqlalchemy import select, update
+from sqlalchemy import update
 from afsp_app.app.database import async_session_maker, User
 
 async def verify_user():
@@ -12,17 +12,15 @@ async def verify_user():
     user_id = "ca868460-38e7-4855-a825-51bcf0f17c62"
     
     async with async_session_maker() as session:
-        # Update user to be verified
-        await session.execute(
+        # Update user to be verified, reading the row back in the same statement
+        result = await session.execute(
             update(User)
             .where(User.id == user_id)
             .values(is_verified=True)
+            .returning(User)
         )
-        await session.commit()
-        
-        # Verify the update
-        result = await session.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
+        await session.commit()
         
         if user:
             print(f"✅ User updated:")